@@ -2,12 +2,38 @@ from aiohttp import web
 from datetime import timedelta
 from random import randint
 
-from prozorro_chronograph.settings import SMOOTHING_MAX, SMOOTHING_MIN, scheduler
+from prozorro_chronograph.settings import (
+    SMOOTHING_MAX,
+    SMOOTHING_MIN,
+    scheduler,
+    executors,
+    breaker,
+    loop_monitor,
+    PROFILE_INTERVAL,
+    PROFILE_MAX_SECONDS,
+)
 from prozorro_chronograph.utils import get_now
-from prozorro_chronograph.scheduler import recheck_tender, resync_tender
-from prozorro_chronograph.storage import get_calendar, set_holiday, delete_holiday
+from prozorro_chronograph.metrics import DUE_JOBS, RUNNING_JOBS, render
+from prozorro_chronograph.profiler import SamplingProfiler, ProfilerBusy
+from prozorro_chronograph.scheduler import (
+    push,
+    get_jobs_run_times,
+    requeue_dead_letters,
+    get_catch_up_progress,
+    get_single_flight_stats,
+    LIMITER,
+    SESSION,
+)
+from prozorro_chronograph.storage import (
+    get_calendar,
+    set_holiday,
+    delete_holiday,
+    get_full_days_stats,
+    get_dead_letters,
+)
 
 routes = web.RouteTableDef()
+PROFILER = SamplingProfiler(interval=PROFILE_INTERVAL)
 
 
 @routes.get("/resync/{tender_id}")
@@ -15,13 +41,13 @@ async def resync_view(request):
     tender_id = request.match_info["tender_id"]
 
     scheduler.add_job(
-        resync_tender,
+        push,
         run_date=get_now() + timedelta(milliseconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
         misfire_grace_time=60 * 60,
         replace_existing=True,
         name="Resync from api",
         id=f"resync_api_{tender_id}",
-        args=[tender_id],
+        args=["resync", tender_id],
     )
     return web.json_response(None)
 
@@ -31,23 +57,28 @@ async def recheck_view(request):
     tender_id = request.match_info["tender_id"]
 
     scheduler.add_job(
-        recheck_tender,
+        push,
         run_date=get_now() + timedelta(milliseconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
         misfire_grace_time=60 * 60,
         replace_existing=True,
         name="Recheck from api",
         id=f"recheck_api_{tender_id}",
-        args=[tender_id],
+        args=["recheck", tender_id],
     )
     return web.json_response(None)
 
 
 @routes.get("/jobs")
 async def jobs(request):
-    jobs = {i.id: i.next_run_time.isoformat() for i in scheduler.get_jobs()}
+    jobs = {job_id: run_time.isoformat() for job_id, run_time in (await get_jobs_run_times()).items()}
     return web.json_response({"jobs": jobs})
 
 
+@routes.get("/catchup")
+async def catch_up_view(request):
+    return web.json_response(get_catch_up_progress())
+
+
 @routes.get("/calendar")
 async def calendar_view(request):
     working_days = await get_calendar()
@@ -68,7 +99,72 @@ async def delete_holiday_view(request):
     return web.json_response(None)
 
 
+@routes.get("/stats")
+async def stats_view(request):
+    return web.json_response({
+        "full_days": get_full_days_stats(),
+        "rate_limiter": LIMITER.get_stats(),
+        "executor": executors["default"].get_stats(),
+        "session": SESSION.get_stats(),
+        "breaker": breaker.get_stats(),
+        "single_flight": get_single_flight_stats(),
+    })
+
+
+@routes.get("/loop")
+async def loop_view(request):
+    return web.json_response(loop_monitor.get_stats())
+
+
+@routes.get("/profile")
+async def profile_view(request):
+    try:
+        seconds = float(request.query.get("seconds", 10))
+    except ValueError:
+        raise web.HTTPBadRequest(text="seconds should be a number")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise web.HTTPBadRequest(text=f"seconds should be in (0, {PROFILE_MAX_SECONDS}]")
+    stacks = request.query.get("stacks", "loop")
+    if stacks not in ("loop", "tasks"):
+        raise web.HTTPBadRequest(text="stacks should be loop or tasks")
+    try:
+        result = await PROFILER.profile(seconds)
+    except ProfilerBusy:
+        raise web.HTTPConflict(text="Profiler is already running")
+    return web.Response(text=result[stacks])
+
+
+@routes.get("/metrics")
+async def metrics_view(request):
+    for kind, stats in executors["default"].get_stats().items():
+        DUE_JOBS.set(stats["queue"], kind)
+        RUNNING_JOBS.set(stats["in_flight"], kind)
+    return web.Response(
+        body=render().encode(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+@routes.get("/deadletter")
+async def dead_letters_view(request):
+    limit = int(request.query.get("limit", 100))
+    entries = await get_dead_letters(limit=limit)
+    return web.json_response({"entries": [{"id": entry.pop("_id"), **entry} for entry in entries]})
+
+
+@routes.post("/deadletter/requeue")
+async def requeue_dead_letters_view(request):
+    data = await request.json() if request.can_read_body else {}
+    requeued = await requeue_dead_letters(data.get("ids"))
+    return web.json_response({"requeued": requeued})
+
+
+async def close_session(app):
+    await SESSION.close()
+
+
 def create_app():
     app = web.Application()
     app.add_routes(routes=routes)
+    app.on_cleanup.append(close_session)
     return app
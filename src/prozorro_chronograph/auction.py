@@ -9,14 +9,13 @@ from prozorro_chronograph.settings import (
     LOGGER,
 )
 from prozorro_chronograph.api import create_app
-from prozorro_chronograph.scheduler import schedule_auction_planner, check_auction
+from prozorro_chronograph.scheduler import schedule_auction_planner, check_auctions
 from prozorro_chronograph.storage import init_database
 from prozorro_chronograph.utils import parse_date
 
 
 async def process_tender(tender):
     LOGGER.info(f"Start processing tender: {tender['id']}")
-    await check_auction(tender)
     if any(
         "shouldStartAfter" in i.get("auctionPeriod", {})
         and parse_date(i["auctionPeriod"]["shouldStartAfter"], TZ).astimezone(TZ)
@@ -31,6 +30,7 @@ async def process_tender(tender):
 
 
 async def data_handler(_: ClientSession, items: list) -> None:
+    await check_auctions(items)
     process_items_tasks = []
     for tender in items:
         process_items_tasks.append(
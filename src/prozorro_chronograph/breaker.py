@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks outcomes of the last `window` API requests (5xx and connection errors/timeouts are failures)
+    and opens when share of failures reaches `error_rate`.
+    While open, jobs aren't started (see BoundedAsyncIOExecutor); after `open_time` seconds it's half open
+    and lets `probes` jobs of each kind run. If `probes` requests succeed in a row it's closed again
+    and concurrency grows from `probes` to the full limit during `ramp_time` seconds,
+    a failed probe opens it again.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        error_rate: float = 0.5,
+        open_time: float = 30,
+        probes: int = 3,
+        ramp_time: float = 60,
+    ):
+        self.error_rate = error_rate
+        self.open_time = open_time
+        self.probes = probes
+        self.ramp_time = ramp_time
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.transitions = deque(maxlen=20)
+        self.opened = 0
+        self._closed_at = None
+        self._probe_successes = 0
+        self._timer = None
+        self._listeners = []
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def add_listener(self, callback) -> None:
+        """
+        `callback(state)` is called on every state change.
+        """
+        self._listeners.append(callback)
+
+    def get_error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def record(self, ok: bool) -> None:
+        if self.state == OPEN:
+            # responses of requests sent before it was opened
+            return
+        if self.state == HALF_OPEN:
+            if not ok:
+                self._set_state(OPEN, "probe failed")
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self._set_state(CLOSED, f"{self._probe_successes} probes succeeded")
+            return
+        self.outcomes.append(ok)
+        if len(self.outcomes) == self.outcomes.maxlen and self.get_error_rate() >= self.error_rate:
+            self._set_state(OPEN, f"error rate {self.get_error_rate():.2f} of last {len(self.outcomes)} requests")
+
+    def get_limit(self, limit: int) -> int:
+        """
+        Number of jobs that may run at once instead of `limit` in the current state.
+        """
+        if self.state == OPEN:
+            return 0
+        probes = min(limit, self.probes)
+        if self.state == HALF_OPEN:
+            return probes
+        if self._closed_at is not None and self.ramp_time > 0:
+            ramp = (self._now() - self._closed_at) / self.ramp_time
+            if ramp < 1:
+                return max(probes, int(limit * ramp))
+            self._closed_at = None
+        return limit
+
+    def _set_state(self, state: str, reason: str) -> None:
+        self.state = state
+        self.outcomes.clear()
+        self._probe_successes = 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if state == OPEN:
+            self.opened += 1
+            self._timer = asyncio.get_running_loop().call_later(
+                self.open_time, self._set_state, HALF_OPEN, f"{self.open_time}s passed"
+            )
+        self._closed_at = self._now() if state == CLOSED else None
+        self.transitions.append({
+            "state": state,
+            "reason": reason,
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+        for callback in self._listeners:
+            callback(state)
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.get_error_rate(), 2),
+            "requests": len(self.outcomes),
+            "opened": self.opened,
+            "transitions": list(self.transitions),
+        }
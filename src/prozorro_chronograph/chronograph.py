@@ -3,27 +3,34 @@ import sentry_sdk
 from aiohttp import web, ClientSession
 from prozorro_crawler.main import main
 from prozorro_chronograph.settings import (
-    scheduler,
+    loop_monitor,
+    PUBLIC_API_HOST,
     SENTRY_DSN,
 )
 from prozorro_chronograph.api import create_app
-from prozorro_chronograph.scheduler import schedule_next_check
+from prozorro_chronograph.scheduler import plan_next_check, add_jobs, start_scheduler
 from prozorro_chronograph.storage import init_database
 
 
-async def data_handler(_: ClientSession, items: list) -> None:
-    process_items_tasks = []
+async def data_handler(session: ClientSession, items: list) -> None:
+    server_id_cookie = getattr(
+        session.cookie_jar.filter_cookies(PUBLIC_API_HOST).get("SERVER_ID"), "value", None
+    )
+    plan_tasks = []
     for tender in items:
         next_check = tender.get("next_check")
         if next_check:
-            process_items_tasks.append(
-                schedule_next_check(
+            plan_tasks.append(
+                plan_next_check(
                     tender["id"],
                     next_check,
+                    server_id_cookie,
                 )
             )
-    if process_items_tasks:
-        await asyncio.gather(*process_items_tasks)
+    if plan_tasks:
+        jobs = [job for job in await asyncio.gather(*plan_tasks) if job]
+        if jobs:
+            add_jobs(jobs)
 
 
 async def run_services():
@@ -34,7 +41,8 @@ async def run_services():
 
     await init_database()
     await site.start()
-    scheduler.start()
+    loop_monitor.start()
+    await start_scheduler()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import heapq
+import sys
+from time import time
+from collections import defaultdict
+from itertools import count
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.base import run_coroutine_job, run_job
+from apscheduler.util import iscoroutinefunction_partial, datetime_to_utc_timestamp
+
+from prozorro_chronograph.metrics import JOB_LAG
+
+OTHER_KIND = "other"
+
+
+class BoundedAsyncIOExecutor(AsyncIOExecutor):
+    """
+    AsyncIOExecutor that doesn't start all due jobs at once.
+    Jobs are queued by kind (first argument of `push`: recheck/resync, others are `other`)
+    and started in order of their scheduled run time while number of running jobs
+    of the kind is less than its limit.
+
+    With `breaker` limits are reduced by CircuitBreaker.get_limit (no jobs are started while it's open).
+
+    Queue is in memory: jobs taken from job store but not started yet are lost on restart.
+    """
+
+    def __init__(self, limits: dict, default_limit: int, breaker=None):
+        super().__init__()
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self.breaker = breaker
+        if breaker is not None:
+            breaker.add_listener(self._on_breaker_state)
+        self._queues = defaultdict(list)  # kind -> heap of (deadline, number, enqueued_at, job, run_times)
+        self._in_flight = defaultdict(int)
+        self._counter = count()
+        self._waits = defaultdict(lambda: {"started": 0, "wait_total": 0.0, "wait_max": 0.0})
+
+    def get_kind(self, job) -> str:
+        if job.args and isinstance(job.args[0], str) and job.args[0] in self.limits:
+            return job.args[0]
+        return OTHER_KIND
+
+    def get_limit(self, kind: str) -> int:
+        limit = self.limits.get(kind, self.default_limit)
+        if self.breaker is not None:
+            limit = self.breaker.get_limit(limit)
+        return limit
+
+    def _on_breaker_state(self, state: str) -> None:
+        if getattr(self, "_eventloop", None) is not None:
+            for kind in list(self._queues):
+                self._start_jobs(kind)
+
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+        self._queues.clear()
+
+    def _do_submit_job(self, job, run_times):
+        kind = self.get_kind(job)
+        deadline = datetime_to_utc_timestamp(min(run_times))
+        heapq.heappush(
+            self._queues[kind],
+            (deadline, next(self._counter), self._eventloop.time(), job, run_times),
+        )
+        self._start_jobs(kind)
+
+    def _start_jobs(self, kind: str) -> None:
+        queue = self._queues[kind]
+        while queue and self._in_flight[kind] < self.get_limit(kind):
+            _, _, enqueued_at, job, run_times = heapq.heappop(queue)
+            self._start_job(kind, job, run_times, self._eventloop.time() - enqueued_at)
+
+    def _start_job(self, kind: str, job, run_times, waited: float) -> None:
+        def callback(f):
+            self._pending_futures.discard(f)
+            self._in_flight[kind] -= 1
+            try:
+                events = f.result()
+            except BaseException:
+                self._run_job_error(job.id, *sys.exc_info()[1:])
+            else:
+                self._run_job_success(job.id, events)
+            self._start_jobs(kind)
+
+        waits = self._waits[kind]
+        waits["started"] += 1
+        waits["wait_total"] += waited
+        waits["wait_max"] = max(waits["wait_max"], waited)
+        JOB_LAG.observe(max(0.0, time() - datetime_to_utc_timestamp(min(run_times))), kind)
+
+        if iscoroutinefunction_partial(job.func):
+            coro = run_coroutine_job(job, job._jobstore_alias, run_times, self._logger.name)
+            f = self._eventloop.create_task(coro)
+        else:
+            f = self._eventloop.run_in_executor(
+                None, run_job, job, job._jobstore_alias, run_times, self._logger.name
+            )
+        self._in_flight[kind] += 1
+        f.add_done_callback(callback)
+        self._pending_futures.add(f)
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for kind in sorted({*self.limits, *self._queues, *self._in_flight, *self._waits}):
+            queue = self._queues.get(kind, [])
+            waits = self._waits.get(kind, {"started": 0, "wait_total": 0.0, "wait_max": 0.0})
+            oldest = min((item[2] for item in queue), default=None)
+            stats[kind] = {
+                "limit": self.get_limit(kind),
+                "queue": len(queue),
+                "in_flight": self._in_flight.get(kind, 0),
+                "started": waits["started"],
+                "wait_avg": round(waits["wait_total"] / waits["started"], 3) if waits["started"] else 0,
+                "wait_max": round(waits["wait_max"], 3),
+                "queue_age": round(self._eventloop.time() - oldest, 3) if oldest is not None else 0,
+            }
+        return stats
@@ -0,0 +1,305 @@
+import asyncio
+import pickle
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import wraps
+from itertools import count
+from typing import Optional
+
+from apscheduler.job import Job
+from apscheduler.jobstores.mongodb import MongoDBJobStore
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+from bson.binary import Binary
+from pymongo import ASCENDING, ReplaceOne
+
+COMPACT_JOB_FUNC = "prozorro_chronograph.scheduler:push"
+COMPACT_JOB_KINDS = ("recheck", "resync")
+COMPACT_JOB_MISFIRE_GRACE_TIME = 60 * 60
+COMPACT_JOB_FIELDS = ("kind", "tender_id", "run_at", "attempt", "server_id")
+
+
+def monitored(method):
+    """
+    Records call of job store method as a span of LoopMonitor (if job store has one).
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.monitor is None:
+            return method(self, *args, **kwargs)
+        with self.monitor.span(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncMongoDBJobStore(MongoDBJobStore):
+    """
+    MongoDB job store that doesn't block event loop on writes.
+
+    APScheduler calls job store synchronously from the event loop, so every
+    `add_job` / `update_job` / `remove_job` of MongoDBJobStore waits for a database round trip.
+    Here writes are saved to in-memory `pending` state at once and are persisted
+    by a bounded pool of threads (writes of the same job go to the same thread, so they keep order).
+    Reads merge `pending` state with database, so scheduler sees its own writes immediately.
+    `lookup_job_async` makes lookup in the pool too.
+    Calls made from the event loop are recorded as spans of `monitor` (LoopMonitor).
+
+    `add_job` replaces existing job, as chronograph always adds jobs with `replace_existing=True`.
+
+    `push` jobs (recheck/resync of tender) are stored as plain fields
+    `{kind, tender_id, run_at, attempt, server_id}` and rebuilt without unpickling,
+    other jobs are pickled as usual (`next_run_time`, `job_state`).
+    """
+
+    def __init__(self, workers: int = 4, monitor=None, **kwargs):
+        super().__init__(**kwargs)
+        self.monitor = monitor
+        self._writers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"jobstore-writer-{i}")
+            for i in range(workers)
+        ]
+        self._readers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobstore-reader")
+        self._pending = {}  # job_id -> (write number, Job or None if removed)
+        self._pending_lock = threading.Lock()
+        self._counter = count()
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self.collection.create_index("run_at", sparse=True)
+
+    @staticmethod
+    def _is_compact(job: Job) -> bool:
+        if job.func_ref != COMPACT_JOB_FUNC or not 2 <= len(job.args) <= 3:
+            return False
+        kind, tender_id = job.args[:2]
+        return (
+            kind in COMPACT_JOB_KINDS
+            and job.id == f"{kind}_{tender_id}"
+            and job.name == f"{kind.capitalize()} {tender_id}"
+            and set(job.kwargs) <= {"attempt"}
+            and isinstance(job.trigger, DateTrigger)
+            and job.next_run_time is not None
+            and job.next_run_time == job.trigger.run_date
+            and job.executor == "default"
+            and job.misfire_grace_time == COMPACT_JOB_MISFIRE_GRACE_TIME
+            and job.coalesce is True
+            and job.max_instances == 1
+        )
+
+    def _serialize(self, job: Job) -> dict:
+        if self._is_compact(job):
+            return {
+                "kind": job.args[0],
+                "tender_id": job.args[1],
+                "run_at": datetime_to_utc_timestamp(job.next_run_time),
+                "attempt": job.kwargs.get("attempt", 0),
+                "server_id": job.args[2] if len(job.args) > 2 else None,
+            }
+        return {
+            "next_run_time": datetime_to_utc_timestamp(job.next_run_time),
+            "job_state": Binary(pickle.dumps(job.__getstate__(), self.pickle_protocol)),
+        }
+
+    def _load_job(self, document: dict) -> Job:
+        if "job_state" in document:
+            return self._reconstitute_job(document["job_state"])
+        kind, tender_id = document["kind"], document["tender_id"]
+        run_at = utc_timestamp_to_datetime(document["run_at"]).astimezone(self._scheduler.timezone)
+        job = Job.__new__(Job)
+        job.__setstate__({
+            "id": f"{kind}_{tender_id}",
+            "func": COMPACT_JOB_FUNC,
+            "trigger": DateTrigger(run_at, timezone=self._scheduler.timezone),
+            "executor": "default",
+            "args": (kind, tender_id, document["server_id"]),
+            "kwargs": {"attempt": document["attempt"]} if document["attempt"] else {},
+            "name": f"{kind.capitalize()} {tender_id}",
+            "misfire_grace_time": COMPACT_JOB_MISFIRE_GRACE_TIME,
+            "coalesce": True,
+            "max_instances": 1,
+            "next_run_time": run_at,
+        })
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _find_job(self, job_id: str) -> Optional[Job]:
+        document = self.collection.find_one(job_id, ["job_state", *COMPACT_JOB_FIELDS])
+        return self._load_job(document) if document else None
+
+    def _get_jobs(self, conditions: dict) -> list:
+        jobs = []
+        failed_job_ids = []
+        for document in self.collection.find(conditions, ["job_state", *COMPACT_JOB_FIELDS]):
+            try:
+                jobs.append(self._load_job(document))
+            except BaseException:
+                self._logger.exception(f"Unable to restore job {document['_id']} -- removing it")
+                failed_job_ids.append(document["_id"])
+        if failed_job_ids:
+            self.collection.delete_many({"_id": {"$in": failed_job_ids}})
+        return jobs
+
+    @staticmethod
+    def _run_time_conditions(condition) -> dict:
+        return {"$or": [{"run_at": condition}, {"next_run_time": condition}]}
+
+    def _set_pending(self, job_id: str, job: Optional[Job]) -> int:
+        number = next(self._counter)
+        with self._pending_lock:
+            self._pending[job_id] = (number, job)
+        return number
+
+    def _release_pending(self, written: list) -> None:
+        with self._pending_lock:
+            for job_id, number in written:
+                if self._pending.get(job_id, (None,))[0] == number:
+                    del self._pending[job_id]
+
+    def _writer_index(self, job_id: str) -> int:
+        return hash(job_id) % len(self._writers)
+
+    def _submit(self, job_id: str, job: Optional[Job], write, *args):
+        number = self._set_pending(job_id, job)
+        writer = self._writers[self._writer_index(job_id)]
+        return writer.submit(self._write, job_id, number, write, *args)
+
+    def _write(self, job_id: str, number: int, write, *args):
+        try:
+            write(*args)
+        except Exception:
+            self._logger.exception(f"Unable to save job {job_id}")
+        finally:
+            self._release_pending([(job_id, number)])
+
+    def _write_batch(self, written: list, requests: list):
+        try:
+            self.collection.bulk_write(requests, ordered=False)
+        except Exception:
+            self._logger.exception(f"Unable to save {len(requests)} jobs")
+        finally:
+            self._release_pending(written)
+
+    def _pending_jobs(self) -> dict:
+        with self._pending_lock:
+            return {job_id: job for job_id, (_, job) in self._pending.items()}
+
+    def flush(self) -> None:
+        """
+        Waits for all pending writes.
+        """
+        wait([writer.submit(lambda: None) for writer in self._writers])
+
+    @monitored
+    def add_job(self, job: Job) -> None:
+        document = self._serialize(job)
+        self._submit(job.id, job, self.collection.replace_one, {"_id": job.id}, document, True)
+
+    @monitored
+    def add_jobs(self, jobs: list) -> None:
+        """
+        Adds (or replaces) jobs with one unordered bulk write per writer thread.
+        """
+        batches = defaultdict(lambda: ([], []))
+        for job in jobs:
+            document = self._serialize(job)
+            number = self._set_pending(job.id, job)
+            written, requests = batches[self._writer_index(job.id)]
+            written.append((job.id, number))
+            requests.append(ReplaceOne({"_id": job.id}, document, upsert=True))
+        for index, (written, requests) in batches.items():
+            self._writers[index].submit(self._write_batch, written, requests)
+
+    @monitored
+    def update_job(self, job: Job) -> None:
+        document = self._serialize(job)
+        self._submit(job.id, job, self.collection.replace_one, {"_id": job.id}, document)
+
+    @monitored
+    def remove_job(self, job_id: str) -> None:
+        self._submit(job_id, None, self.collection.delete_one, {"_id": job_id})
+
+    def remove_all_jobs(self) -> None:
+        with self._pending_lock:
+            self._pending.clear()
+        self.flush()
+        super().remove_all_jobs()
+
+    @monitored
+    def lookup_job(self, job_id: str) -> Optional[Job]:
+        pending = self._pending_jobs()
+        if job_id in pending:
+            return pending[job_id]
+        return self._find_job(job_id)
+
+    async def lookup_job_async(self, job_id: str) -> Optional[Job]:
+        pending = self._pending_jobs()
+        if job_id in pending:
+            return pending[job_id]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._find_job, job_id)
+
+    def _merge(self, jobs: list, pending: dict, condition) -> list:
+        jobs = [job for job in jobs if job.id not in pending]
+        jobs.extend(job for job in pending.values() if job is not None and condition(job))
+        jobs.sort(key=lambda job: datetime_to_utc_timestamp(job.next_run_time) or float("inf"))
+        return jobs
+
+    @monitored
+    def get_due_jobs(self, now):
+        pending = self._pending_jobs()
+        jobs = self._get_jobs(self._run_time_conditions({"$lte": datetime_to_utc_timestamp(now)}))
+        return self._merge(jobs, pending, lambda job: job.next_run_time and job.next_run_time <= now)
+
+    async def get_due_jobs_async(self, now) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self.get_due_jobs, now)
+
+    @monitored
+    def get_next_run_time(self):
+        pending = self._pending_jobs()
+        run_times = [job.next_run_time for job in pending.values() if job is not None and job.next_run_time]
+        for field in ("run_at", "next_run_time"):
+            document = self.collection.find_one(
+                {field: {"$ne": None}, "_id": {"$nin": list(pending)}},
+                projection=[field],
+                sort=[(field, ASCENDING)],
+            )
+            if document:
+                run_times.append(utc_timestamp_to_datetime(document[field]))
+        return min(run_times) if run_times else None
+
+    def get_run_times(self) -> dict:
+        """
+        Returns {job_id: next_run_time} of all jobs, reading only run time fields.
+        """
+        pending = self._pending_jobs()
+        run_times = {}
+        for document in self.collection.find({}, ["run_at", "next_run_time"]):
+            timestamp = document.get("run_at", document.get("next_run_time"))
+            run_times[document["_id"]] = utc_timestamp_to_datetime(timestamp) if timestamp else None
+        for job_id, job in pending.items():
+            if job is None:
+                run_times.pop(job_id, None)
+            else:
+                run_times[job_id] = job.next_run_time
+        return run_times
+
+    async def get_run_times_async(self) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self.get_run_times)
+
+    @monitored
+    def get_all_jobs(self):
+        pending = self._pending_jobs()
+        jobs = self._merge(self._get_jobs({}), pending, lambda job: True)
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def shutdown(self):
+        self.flush()
+        super().shutdown()
@@ -0,0 +1,159 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from time import perf_counter
+
+from prozorro_chronograph.metrics import LOOP_LAG
+
+
+class Span:
+    __slots__ = ("monitor", "name", "started")
+
+    def __init__(self, monitor: "LoopMonitor", name: str):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.monitor.record_span(self.name, perf_counter() - self.started)
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag (how late a sleep of `interval` seconds wakes up) and time spent
+    in named synchronous spans (`with monitor.span("get_job"): ...`) that run in the loop thread.
+    Spans longer than `slow_threshold` are reported as slow.
+    With `trace_callbacks` every loop callback is timed (asyncio Handle._run is wrapped),
+    so slow callbacks are reported with the spans that ran inside them.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_threshold: float = 0.1,
+        trace_callbacks: bool = False,
+        logger=None,
+        samples: int = 600,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.trace_callbacks = trace_callbacks
+        self.logger = logger
+        self.lags = deque(maxlen=samples)
+        self.max_lag = 0.0
+        self.spans = {}  # name -> [count, total, max]
+        self.slow = deque(maxlen=50)
+        self._callback_spans = None
+        self._task = None
+        self._original_run = None
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def record_span(self, name: str, duration: float) -> None:
+        if asyncio._get_running_loop() is None:
+            # called from a thread, it doesn't block the loop
+            return
+        stats = self.spans.get(name)
+        if stats is None:
+            stats = self.spans[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+        if self._callback_spans is not None:
+            self._callback_spans.append((name, duration))
+        elif duration >= self.slow_threshold:
+            self.report_slow(name, duration, [])
+
+    def report_slow(self, name: str, duration: float, spans: list) -> None:
+        spans = sorted(spans, key=lambda span: span[1], reverse=True)[:5]
+        self.slow.append({
+            "name": name,
+            "duration": round(duration, 4),
+            "spans": [{"name": span_name, "duration": round(span_duration, 4)} for span_name, span_duration in spans],
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+        if self.logger is not None:
+            inside = ", ".join(f"{span_name} {span_duration:.3f}s" for span_name, span_duration in spans)
+            self.logger.info(f"Slow callback {name} blocked event loop for {duration:.3f}s" + (
+                f" ({inside})" if inside else ""
+            ))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._sample())
+        if self.trace_callbacks and self._original_run is None:
+            self._trace_callbacks()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lags.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            LOOP_LAG.observe(lag)
+
+    def _trace_callbacks(self) -> None:
+        monitor = self
+        original_run = self._original_run = asyncio.events.Handle._run
+
+        def _run(handle):
+            monitor._callback_spans = []
+            started = perf_counter()
+            try:
+                original_run(handle)
+            finally:
+                duration = perf_counter() - started
+                spans, monitor._callback_spans = monitor._callback_spans, None
+                if duration >= monitor.slow_threshold:
+                    monitor.report_slow(describe_callback(handle), duration, spans)
+
+        asyncio.events.Handle._run = _run
+
+    def get_stats(self) -> dict:
+        lags = sorted(self.lags)
+        return {
+            "lag": {
+                "last": round(self.lags[-1], 4) if self.lags else 0,
+                "p50": round(lags[len(lags) // 2], 4) if lags else 0,
+                "p99": round(lags[int(len(lags) * 0.99)], 4) if lags else 0,
+                "max": round(self.max_lag, 4),
+                "samples": len(lags),
+            },
+            "spans": {
+                name: {
+                    "count": count,
+                    "total": round(total, 4),
+                    "avg": round(total / count, 6),
+                    "max": round(max_duration, 4),
+                }
+                for name, (count, total, max_duration) in sorted(
+                    self.spans.items(), key=lambda item: item[1][1], reverse=True
+                )
+            },
+            "slow": list(self.slow),
+        }
+
+
+def describe_callback(handle) -> str:
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"task {getattr(coro, '__qualname__', repr(coro))}"
+    return getattr(callback, "__qualname__", repr(callback))
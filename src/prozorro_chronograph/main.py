@@ -3,14 +3,14 @@ import sentry_sdk
 from aiohttp import web, ClientSession
 from prozorro_crawler.main import main
 from prozorro_chronograph.settings import (
-    scheduler,
+    loop_monitor,
     PUBLIC_API_HOST,
     INVALID_STATUSES,
     LOGGER,
     SENTRY_DSN,
 )
 from prozorro_chronograph.api import create_app
-from prozorro_chronograph.scheduler import process_listing
+from prozorro_chronograph.scheduler import process_listing, check_auctions, start_scheduler
 from prozorro_chronograph.storage import init_database
 
 
@@ -18,16 +18,16 @@ async def data_handler(session: ClientSession, items: list) -> None:
     server_id_cookie = getattr(
         session.cookie_jar.filter_cookies(PUBLIC_API_HOST).get("SERVER_ID"), "value", None
     )
-    process_items_tasks = []
+    process_items = []
     for item in items:
         status = item.get("status", None)
         tender_id = item.get("id", None)
         if item.get("status", None) not in INVALID_STATUSES:
-            coroutine = process_listing(server_id_cookie, item)
-            process_items_tasks.append(coroutine)
+            process_items.append(item)
         else:
             LOGGER.info(f"Skip tender {tender_id} with status {status}")
-    await asyncio.gather(*process_items_tasks)
+    await check_auctions(process_items)
+    await asyncio.gather(*[process_listing(server_id_cookie, item) for item in process_items])
 
 
 async def run_services():
@@ -38,7 +38,8 @@ async def run_services():
 
     await init_database()
     await site.start()
-    scheduler.start()
+    loop_monitor.start()
+    await start_scheduler()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+from bisect import bisect_left
+from time import perf_counter
+
+METRICS = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metric:
+    """
+    Minimal prometheus metric: values are kept in a dict by tuple of label values,
+    so recording is a dict lookup and an addition.
+    """
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        METRICS.append(self)
+
+    def format_labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{escape(value)}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for values, value in sorted(self.values.items(), key=sort_key):
+            lines.append(f"{self.name}{self.format_labels(values)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        counts = self.values.get(labels)
+        if counts is None:
+            # counts of buckets (the last one is +Inf) and sum
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, *labels) -> "Timer":
+        return Timer(self, labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for values, counts in sorted(self.values.items(), key=sort_key):
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self.format_labels(values, le)} {total}")
+            lines.append(f"{self.name}_sum{self.format_labels(values)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self.format_labels(values)} {total}")
+        return lines
+
+
+class Timer:
+    """
+    Context manager that observes duration of the block in seconds.
+    """
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.started, *self.labels)
+
+
+def sort_key(item) -> tuple:
+    return tuple(str(value) for value in item[0])
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    """
+    Returns all metrics in prometheus text exposition format.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+JOB_LAG = Histogram(
+    "chronograph_job_lag_seconds",
+    "Time between planned run time of job and its start",
+    ["kind"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+DUE_JOBS = Gauge("chronograph_due_jobs", "Due jobs waiting in executor queue", ["kind"])
+RUNNING_JOBS = Gauge("chronograph_running_jobs", "Jobs running now", ["kind"])
+PUSH_DURATION = Histogram(
+    "chronograph_push_duration_seconds",
+    "Duration of recheck_tender/resync_tender",
+    ["mode"],
+)
+API_REQUEST_DURATION = Histogram(
+    "chronograph_api_request_duration_seconds",
+    "Duration of requests to API (without waiting for rate limiter)",
+    ["method"],
+)
+API_RESPONSES = Counter(
+    "chronograph_api_responses_total",
+    "Responses from API by status code (`error` for connection errors and timeouts)",
+    ["method", "status"],
+)
+PLANNING_DURATION = Histogram("chronograph_planning_auction_duration_seconds", "Duration of planning_auction")
+PLANNING_DAYS = Histogram(
+    "chronograph_planning_auction_days",
+    "Number of days walked by planning_auction to find a slot",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+MONGODB_CALLS = Counter(
+    "chronograph_mongodb_calls_total",
+    "Calls of MongoDB collection operations by storage function",
+    ["function", "operation"],
+)
+LOOP_LAG = Histogram(
+    "chronograph_loop_lag_seconds",
+    "Event loop lag: how late the loop monitor wakes up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+from pymongo import ReplaceOne
+
+from prozorro_chronograph.settings import (
+    MONGODB_PLANS_COLLECTION,
+    MONGODB_SLOTS_COLLECTION,
+    LOGGER,
+)
+from prozorro_chronograph.storage import (
+    get_mongodb_collection,
+    get_slot_id,
+    parse_plan_id,
+    init_slots_collection,
+)
+
+BATCH_SIZE = 1000
+
+
+async def migrate_plans(keep_nested: bool = False) -> int:
+    """
+    Copies slots of nested `plan{mode}_{date}` documents to slots collection
+    (one document per slot). Plan document is left with `time` and `streams_count` only,
+    unless `keep_nested` is set. Migration is idempotent, so it's safe to run it again.
+    """
+    plans = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
+    slots = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+    await init_slots_collection()
+
+    migrated = 0
+    async for plan in plans.find({"streams": {"$exists": True}}):
+        plan_id = plan["_id"]
+        if not plan_id.startswith("plan") or "_" not in plan_id:
+            continue
+        mode, date = parse_plan_id(plan_id)
+        requests = [
+            ReplaceOne(
+                {"_id": get_slot_id(plan_id, stream["stream_id"], slot["time"])},
+                {
+                    "mode": mode,
+                    "date": date,
+                    "time": slot["time"],
+                    "stream_id": stream["stream_id"],
+                    "tender_id": slot["tender_id"],
+                    "lot_id": slot["lot_id"],
+                },
+                upsert=True,
+            )
+            for stream in plan["streams"]
+            for slot in stream.get("slots", [])
+        ]
+        for i in range(0, len(requests), BATCH_SIZE):
+            await slots.bulk_write(requests[i:i + BATCH_SIZE], ordered=False)
+        if not keep_nested:
+            await plans.update_one({"_id": plan_id}, {"$unset": {"streams": ""}})
+        migrated += 1
+        LOGGER.info(f"Plan {plan_id} migrated, {len(requests)} slots")
+    LOGGER.info(f"Migrated {migrated} plans to {MONGODB_SLOTS_COLLECTION} collection")
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate nested auction plans to slot-per-document layout")
+    parser.add_argument(
+        "--keep-nested",
+        action="store_true",
+        help="don't remove `streams` from plan documents (allows to switch back to nested layout)",
+    )
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(migrate_plans(keep_nested=args.keep_nested))
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+
+MAX_STACK_DEPTH = 100
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def get_frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def get_thread_stack(frame) -> list:
+    stack = []
+    while frame is not None:
+        stack.append(get_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def get_coro_stack(coro) -> list:
+    """
+    Frames of coroutine and coroutines it awaits, outermost first.
+    """
+    stack = []
+    while coro is not None and len(stack) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if not isinstance(frame, FrameType):
+            break
+        stack.append(get_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return stack
+
+
+def collapse(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """
+    Samples for given number of seconds:
+    - stack of the event loop thread every `interval` seconds (from a separate thread),
+      so code that runs or blocks the loop is `loop;...` stacks,
+    - await chains of all other asyncio tasks every `task_interval` seconds, as `task;...` stacks.
+    Result is {"loop": ..., "tasks": ...} in collapsed stack format (`frame;frame;frame count` lines)
+    for flamegraph tools. They are separate, as they're sampled with different intervals.
+    Only one session runs at a time, nothing is done between sessions.
+    """
+
+    def __init__(self, interval: float = 0.01, task_interval: float = 0.1):
+        self.interval = interval
+        self.task_interval = task_interval
+        self.running = False
+
+    async def profile(self, seconds: float) -> dict:
+        if self.running:
+            raise ProfilerBusy()
+        self.running = True
+        try:
+            loop = asyncio.get_running_loop()
+            loop_stacks, task_stacks = Counter(), Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sample_thread,
+                args=(threading.get_ident(), loop_stacks, stop),
+                name="profiler",
+                daemon=True,
+            )
+            sampler.start()
+            try:
+                deadline = loop.time() + seconds
+                while loop.time() < deadline:
+                    self._sample_tasks(task_stacks)
+                    await asyncio.sleep(min(self.task_interval, max(0.0, deadline - loop.time())))
+            finally:
+                stop.set()
+                await loop.run_in_executor(None, sampler.join)
+        finally:
+            self.running = False
+        return {"loop": collapse(loop_stacks), "tasks": collapse(task_stacks)}
+
+    def _sample_thread(self, thread_id: int, stacks: Counter, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                stacks[";".join(["loop"] + get_thread_stack(frame))] += 1
+
+    @staticmethod
+    def _sample_tasks(stacks: Counter) -> None:
+        current = asyncio.current_task()
+        for task in asyncio.all_tasks():
+            if task is not current:
+                stacks[";".join(["task"] + get_coro_stack(task.get_coro()))] += 1
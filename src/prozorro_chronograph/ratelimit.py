@@ -0,0 +1,64 @@
+import asyncio
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by all requests to API.
+    Rate is adapted as AIMD: it's halved on 429 (not more often than once a second,
+    as requests sent at the same time get 429 together) and grows by `increase`
+    requests per second each second without 429, up to `ceiling`.
+    """
+
+    def __init__(self, ceiling: float, floor: float = 1, increase: float = 1, decrease: float = 0.5):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.increase = increase
+        self.decrease = decrease
+        self.rate = ceiling
+        self.tokens = ceiling
+        self.updated_at = None
+        self.decreased_at = None
+        self.waiting = 0
+        self.throttled = 0
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def _refill(self, now: float) -> None:
+        if self.updated_at is not None:
+            elapsed = max(0.0, now - self.updated_at)
+            self.tokens = min(max(self.rate, 1), self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        self.waiting += 1
+        try:
+            while True:
+                self._refill(self._now())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def on_response(self, status: int) -> None:
+        now = self._now()
+        if status == 429:
+            self.throttled += 1
+            if self.decreased_at is None or now - self.decreased_at >= 1:
+                self.rate = max(self.floor, self.rate * self.decrease)
+                self.tokens = min(self.tokens, self.rate)
+                self.decreased_at = now
+        elif self.rate < self.ceiling:
+            # additive increase: about `increase` rps per second of successful requests
+            self.rate = min(self.ceiling, self.rate + self.increase / self.rate)
+
+    def get_stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "ceiling": self.ceiling,
+            "queue": self.waiting,
+            "throttled": self.throttled,
+        }
@@ -1,18 +1,28 @@
 import json
 import asyncio
-from aiohttp import ClientSession
+from bisect import bisect_right
+from time import perf_counter
+from aiohttp import ClientError
 from random import randint
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import List, Optional, Tuple
+from apscheduler.job import Job
+from apscheduler.triggers.date import DateTrigger
 from prozorro_crawler.settings import CRAWLER_USER_AGENT
 
 from prozorro_chronograph.storage import (
     get_calendar,
     get_streams,
-    get_date,
-    set_date,
+    get_dates,
+    is_day_full,
+    mark_day_full,
+    reserve_slot,
     find_free_slot,
     free_slots,
+    free_slots_batch,
+    add_dead_letter,
+    get_dead_letters,
+    remove_dead_letters,
 )
 from prozorro_chronograph.settings import (
     TZ,
@@ -24,51 +34,239 @@ from prozorro_chronograph.settings import (
     WORKING_DAY_END,
     LOGGER,
     scheduler,
+    jobstores,
+    breaker,
+    loop_monitor,
     SMOOTHING_MIN,
     SMOOTHING_MAX,
     SMOOTHING_REMIN,
     INVALID_STATUSES,
+    PLANNING_WINDOW_DAYS,
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_MIN,
+    API_RATE_LIMIT_INCREASE,
+    API_CONNECTIONS_LIMIT,
+    API_CONNECTIONS_LIMIT_PER_HOST,
+    API_KEEPALIVE_TIMEOUT,
+    API_DNS_CACHE_TTL,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
+    PUSH_RETRY_LIMIT,
+    PUSH_RETRY_DELAY,
+    PUSH_RETRY_MAX_DELAY,
+    CATCH_UP_WINDOW,
+    CATCH_UP_RATE,
 )
+from prozorro_chronograph.breaker import OPEN
+from prozorro_chronograph.metrics import (
+    API_REQUEST_DURATION,
+    API_RESPONSES,
+    PUSH_DURATION,
+    PLANNING_DURATION,
+    PLANNING_DAYS,
+)
+from prozorro_chronograph.ratelimit import AdaptiveRateLimiter
+from prozorro_chronograph.session import APISession
+from prozorro_chronograph.workdays import get_working_days_index
 from prozorro_chronograph.utils import (
     get_now,
+    get_jitter,
     randomize,
     calc_auction_end_time,
     skipped_days,
     parse_date,
 )
 
-SESSION = ClientSession(
+SESSION = APISession(
     headers={
         "Content-Type": "application/json",
         "Authorization": f"Bearer {API_TOKEN}",
         "User-Agent": CRAWLER_USER_AGENT
-    }
+    },
+    limit=API_CONNECTIONS_LIMIT,
+    limit_per_host=API_CONNECTIONS_LIMIT_PER_HOST,
+    keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl=API_DNS_CACHE_TTL,
+    connect_timeout=API_CONNECT_TIMEOUT,
+    read_timeout=API_READ_TIMEOUT,
 )
 
+LIMITER = AdaptiveRateLimiter(
+    ceiling=API_RATE_LIMIT,
+    floor=API_RATE_LIMIT_MIN,
+    increase=API_RATE_LIMIT_INCREASE,
+)
+
+
+def get_server_id(response, server_id: str = None) -> str:
+    """
+    Returns SERVER_ID cookie set by response (API backend to stick to) or the current one.
+    """
+    cookie = response.cookies.get("SERVER_ID")
+    return cookie.value if cookie else server_id
+
+
+async def request_api(method: str, url: str, server_id: str = None, **kwargs):
+    """
+    Makes request to API with SESSION, waiting for the shared rate limiter.
+    Request is pinned to API backend by `server_id` cookie (captured with the feed),
+    on 412 it's repeated once with the refreshed cookie from the response.
+    5xx responses and connection errors are counted by API circuit breaker.
+    """
+    for attempt in range(2):
+        if server_id:
+            kwargs["cookies"] = {"SERVER_ID": server_id}
+        await LIMITER.acquire()
+        started = perf_counter()
+        try:
+            response = await getattr(SESSION, method)(url, **kwargs)
+        except (ClientError, asyncio.TimeoutError):
+            API_RESPONSES.inc(method, "error")
+            breaker.record(False)
+            raise
+        finally:
+            API_REQUEST_DURATION.observe(perf_counter() - started, method)
+        API_RESPONSES.inc(method, str(response.status))
+        LIMITER.on_response(response.status)
+        breaker.record(response.status < 500)
+        if response.status != 412 or attempt:
+            break
+        new_server_id = get_server_id(response)
+        if not new_server_id or new_server_id == server_id:
+            break
+        LOGGER.info(f"Got 412 on {url}, repeat with refreshed SERVER_ID cookie")
+        server_id = new_server_id
+    return response
+
+
+def on_breaker_state(state: str) -> None:
+    """
+    Stops taking due jobs from job store while API circuit breaker is open,
+    so they wait there instead of failing and being rescheduled.
+    """
+    LOGGER.info(f"API circuit breaker is {state}")
+    if not scheduler.running:
+        return
+    if state == OPEN:
+        scheduler.pause()
+    else:
+        scheduler.resume()
+
+
+breaker.add_listener(on_breaker_state)
+
 
 class RetryError(Exception):
     pass
 
 
-async def push(mode: str, tender_id: str, server_id: str = None) -> None:
-    tx = ty = 1
-    while True:
-        try:
-            if mode == "recheck":
-                await recheck_tender(tender_id)
-            elif mode == "resync":
-                await resync_tender(tender_id)
-            else:
-                LOGGER.error(f"Unexpected mode {mode}")
-                break
-        except RetryError:
-            pass
-        except Exception as e:
-            LOGGER.error(f"Error on {mode} tender {tender_id}: {repr(e)}")
+IN_FLIGHT = {}  # tender_id -> (mode, future resolved when the call is finished)
+SINGLE_FLIGHT = {"coalesced": 0, "waited": 0}
+
+
+async def push(mode: str, tender_id: str, server_id: str = None, attempt: int = 0) -> None:
+    """
+    Runs recheck/resync of tender, so that calls for one tender never overlap:
+    a call of the same mode as the one in flight is coalesced with it (isn't run),
+    a call of other mode waits until the one in flight is finished.
+    """
+    while tender_id in IN_FLIGHT:
+        in_flight_mode, done = IN_FLIGHT[tender_id]
+        if in_flight_mode == mode:
+            SINGLE_FLIGHT["coalesced"] += 1
+            LOGGER.info(f"Coalesced {mode} tender {tender_id} with the one in flight")
+            await asyncio.shield(done)
+            return
+        SINGLE_FLIGHT["waited"] += 1
+        await asyncio.shield(done)
+    done = asyncio.get_running_loop().create_future()
+    IN_FLIGHT[tender_id] = (mode, done)
+    try:
+        await run_push(mode, tender_id, server_id, attempt)
+    finally:
+        del IN_FLIGHT[tender_id]
+        done.set_result(None)
+
+
+def get_single_flight_stats() -> dict:
+    return {"in_flight": len(IN_FLIGHT), **SINGLE_FLIGHT}
+
+
+async def run_push(mode: str, tender_id: str, server_id: str = None, attempt: int = 0) -> None:
+    try:
+        if mode == "recheck":
+            with PUSH_DURATION.time(mode):
+                await recheck_tender(tender_id, server_id)
+        elif mode == "resync":
+            with PUSH_DURATION.time(mode):
+                await resync_tender(tender_id, server_id)
         else:
-            break
-        await asyncio.sleep(tx)
+            LOGGER.error(f"Unexpected mode {mode}")
+        return
+    except RetryError:
+        error = f"Retry {mode} tender {tender_id}"
+    except Exception as e:
+        error = f"Error on {mode} tender {tender_id}: {repr(e)}"
+        LOGGER.error(error)
+    await retry_push(mode, tender_id, server_id, attempt + 1, error)
+
+
+def get_retry_delay(attempt: int) -> timedelta:
+    """
+    Fibonacci backoff: 1, 1, 2, 3, 5... times PUSH_RETRY_DELAY, up to PUSH_RETRY_MAX_DELAY.
+    """
+    tx = ty = 1
+    for _ in range(attempt - 1):
         tx, ty = ty, tx + ty
+        if tx * PUSH_RETRY_DELAY >= PUSH_RETRY_MAX_DELAY:
+            break
+    return timedelta(seconds=min(tx * PUSH_RETRY_DELAY, PUSH_RETRY_MAX_DELAY))
+
+
+async def retry_push(mode: str, tender_id: str, server_id: str, attempt: int, error: str) -> None:
+    """
+    Schedules failed push job again with `attempt` saved in the job,
+    or moves it to dead letter collection when PUSH_RETRY_LIMIT attempts are used.
+    """
+    if attempt >= PUSH_RETRY_LIMIT:
+        LOGGER.error(f"Retries of {mode} tender {tender_id} are exhausted after {attempt} attempts")
+        await add_dead_letter(mode, tender_id, server_id, attempt, error)
+        return
+    job_id = f"{mode}_{tender_id}"
+    run_date = get_now() + get_retry_delay(attempt)
+    if is_job_planned(await get_job(job_id), run_date, earlier_is_enough=True):
+        return
+    add_jobs([dict(
+        func=push,
+        id=job_id,
+        name=f"{mode.capitalize()} {tender_id}",
+        run_date=run_date,
+        args=[mode, tender_id, server_id],
+        kwargs={"attempt": attempt},
+    )])
+    LOGGER.info(f"Retry {mode} tender {tender_id} at {run_date.isoformat()} (attempt {attempt})")
+
+
+async def requeue_dead_letters(ids: list = None) -> int:
+    """
+    Schedules jobs from dead letter collection (all or with given ids) again with a new retry budget.
+    """
+    entries = await get_dead_letters(ids)
+    if not entries:
+        return 0
+    add_jobs([
+        dict(
+            func=push,
+            id=entry["_id"],
+            name=f"{entry['mode'].capitalize()} {entry['tender_id']}",
+            run_date=get_now() + get_jitter(entry["tender_id"]),
+            args=[entry["mode"], entry["tender_id"], entry["server_id"]],
+        )
+        for entry in entries
+    ])
+    await remove_dead_letters([entry["_id"] for entry in entries])
+    LOGGER.info(f"Requeued {len(entries)} jobs from dead letter collection")
+    return len(entries)
 
 
 async def planning_auction(
@@ -84,26 +282,31 @@ async def planning_auction(
     if quick:
         quick_start = calc_auction_end_time(0, start)
         return quick_start, 0, skipped_days
+    started = perf_counter()
     start += timedelta(hours=1)
     if start.time() < WORKING_DAY_START:
         nextDate = start.date()
     else:
         nextDate = start.date() + timedelta(days=1)
-    new_slot = True
+    workdays = get_working_days_index(calendar)
+    plans = {}
     while True:
-        if calendar.get(nextDate.isoformat()) or nextDate.weekday() in [
-            5,
-            6,
-        ]:  # skip Saturday and Sunday
+        nextDate = workdays.next_working_day(nextDate)
+        if is_day_full(mode, nextDate, streams):
             nextDate += timedelta(days=1)
+            skipped_days += 1
             continue
-        dayStart, stream, plan = await get_date(mode, nextDate)
+        if nextDate not in plans:
+            # fetch plans of the next working days at once, as near days are often full
+            plans = await get_dates(mode, workdays.working_days(nextDate, PLANNING_WINDOW_DAYS))
+        dayStart, stream, plan = plans[nextDate]
         LOGGER.info(f"Finding free slot for {tender_id}. "
                     f"Number of streams in plan {stream}. "
                     f"Max streams: {streams}. "
                     f"Plan got streams: {plan.get('streams_count', None)}. "
                     f"Day of start is: {dayStart}")
-        freeSlot = find_free_slot(plan)
+        with loop_monitor.span("find_free_slot"):
+            freeSlot = find_free_slot(plan)
         LOGGER.info(f"Free slot was found for tender {tender_id}, slot: {freeSlot}")
         if freeSlot:
             startDate, stream = freeSlot
@@ -113,58 +316,79 @@ async def planning_auction(
                 startDate.time(),
                 False,
             )
+        else:
+            if dayStart >= WORKING_DAY_END and stream >= streams:
+                mark_day_full(mode, nextDate)
+                nextDate += timedelta(days=1)
+                skipped_days += 1
+                continue
+            if dayStart >= WORKING_DAY_END and stream < streams:
+                stream += 1
+                dayStart = WORKING_DAY_START
+            start = TZ.localize(datetime.combine(nextDate, dayStart))
+            end = start + timedelta(minutes=30)
+            if dayStart != WORKING_DAY_START and end > TZ.localize(
+                datetime.combine(nextDate, WORKING_DAY_END)
+            ):
+                nextDate += timedelta(days=1)
+                skipped_days += 1
+                continue
+            new_slot = True
+        LOGGER.info(f"Setting date for {tender_id} in {plan['_id']}. In {stream} stream.")
+        reserved = await reserve_slot(
+            plan=plan,
+            stream_id=stream,
+            tender_id=tender_id,
+            lot_id=lot_id,
+            start_time=dayStart,
+            end_time=end.time(),
+            new_slot=new_slot,
+        )
+        if reserved:
             break
-        if dayStart >= WORKING_DAY_END and stream >= streams:
-            nextDate += timedelta(days=1)
-            skipped_days += 1
-            continue
-        if dayStart >= WORKING_DAY_END and stream < streams:
-            stream += 1
-            dayStart = WORKING_DAY_START
-        start = TZ.localize(datetime.combine(nextDate, dayStart))
-        end = start + timedelta(minutes=30)
-        if dayStart == WORKING_DAY_START and end > TZ.localize(
-            datetime.combine(nextDate, WORKING_DAY_END)
-        ):
-            break
-        elif end <= TZ.localize(datetime.combine(nextDate, WORKING_DAY_END)):
-            break
-        nextDate += timedelta(days=1)
-        skipped_days += 1
-    LOGGER.info(f"Setting date for {tender_id} in {plan['_id']}. In {stream} stream.")
-    await set_date(
-        plan_id=plan["_id"],
-        end_time=end.time(),
-        stream_id=stream,
-        tender_id=tender_id,
-        lot_id=lot_id,
-        start_time=dayStart,
-        new_slot=new_slot,
-    )
+        # slot was taken by concurrent planning, read plans again for next candidate
+        plans = {}
+    PLANNING_DURATION.observe(perf_counter() - started)
+    PLANNING_DAYS.observe(skipped_days + 1)
     return start, stream, skipped_days
 
 
-async def check_auction(tender: dict) -> None:
+def get_auction_times(tender: dict) -> Tuple[datetime, dict]:
     auction_time = tender.get("auctionPeriod", {}).get("startDate") and parse_date(
         tender.get("auctionPeriod", {}).get("startDate")
     )
-    try:
-        lots = dict(
-            [
-                (i["id"], parse_date(i.get("auctionPeriod", {}).get("startDate")))
-                for i in tender.get("lots", [])
-                if i.get("auctionPeriod", {}).get("startDate")
-            ]
-        )
-    except Exception as e:
-        LOGGER.error(
-            "Error on checking tender auctionPeriod '{}': {}".format(
-                tender.get("id", ""), repr(e)
-            )
-        )
-        return
+    lots = dict(
+        [
+            (i["id"], parse_date(i.get("auctionPeriod", {}).get("startDate")))
+            for i in tender.get("lots", [])
+            if i.get("auctionPeriod", {}).get("startDate")
+        ]
+    )
+    return auction_time, lots
+
+
+async def check_auction(tender: dict) -> None:
+    await check_auctions([tender])
+
 
-    await free_slots(tender["id"], auction_time, lots)
+async def check_auctions(tenders: list) -> None:
+    """
+    Releases slots that are not used by auctions of feed page tenders with one batch.
+    """
+    batch = []
+    for tender in tenders:
+        try:
+            auction_time, lots = get_auction_times(tender)
+        except Exception as e:
+            LOGGER.error(
+                "Error on checking tender auctionPeriod '{}': {}".format(
+                    tender.get("id", ""), repr(e)
+                )
+            )
+            continue
+        batch.append((tender["id"], auction_time, lots))
+    if batch:
+        await free_slots_batch(batch)
 
 
 async def check_tender(tender: dict) -> dict:
@@ -258,27 +482,197 @@ async def check_tender(tender: dict) -> dict:
     return {}
 
 
-async def schedule_next_check(tender_id, next_check):
+async def get_job(job_id: str):
+    """
+    Looks up job without blocking event loop (if job store supports it).
+    """
+    jobstore = jobstores["default"]
+    if scheduler.running and hasattr(jobstore, "lookup_job_async"):
+        return await jobstore.lookup_job_async(job_id)
+    with loop_monitor.span("get_job"):
+        return scheduler.get_job(job_id)
+
+
+async def get_jobs_run_times() -> dict:
+    """
+    Returns {job_id: next_run_time} without restoring jobs (if job store supports it).
+    """
+    jobstore = jobstores["default"]
+    if scheduler.running and hasattr(jobstore, "get_run_times_async"):
+        run_times = await jobstore.get_run_times_async()
+        return {
+            job_id: run_time.astimezone(TZ)
+            for job_id, run_time in run_times.items()
+            if run_time is not None
+        }
+    return {job.id: job.next_run_time for job in scheduler.get_jobs()}
+
+
+def get_check_date(tender_id: str, next_check: datetime, now: datetime) -> datetime:
+    """
+    Returns run date of recheck job. Jitter depends only on tender and next_check,
+    so the same next_check from feed always gives the same run date.
+    """
+    jitter = get_jitter(tender_id, next_check.isoformat())
+    return now + jitter if next_check < now else next_check + jitter
+
+
+def is_job_planned(job, run_date: datetime, earlier_is_enough: bool = False) -> bool:
+    """
+    Checks whether existing job already runs at `run_date`
+    (or before it, if `earlier_is_enough`), so it doesn't need to be rewritten.
+    """
+    if not job or not job.next_run_time:
+        return False
+    if earlier_is_enough:
+        return job.next_run_time <= run_date
+    return job.next_run_time == run_date
+
+
+def add_jobs(jobs: List[dict]) -> None:
+    """
+    Adds (replaces) date jobs, given as `scheduler.add_job` kwargs `func, id, name, args, run_date` (and `kwargs`),
+    with one write to job store (if it supports it) and one scheduler wakeup.
+    """
+    jobstore = jobstores["default"]
+    if not scheduler.running or not hasattr(jobstore, "add_jobs"):
+        for job in jobs:
+            scheduler.add_job(
+                trigger="date",
+                timezone=TZ,
+                misfire_grace_time=60 * 60,
+                replace_existing=True,
+                **job,
+            )
+        return
+    now = get_now()
+    new_jobs = []
+    for job in jobs:
+        trigger = DateTrigger(job["run_date"], timezone=TZ)
+        new_job = Job(
+            scheduler,
+            id=job["id"],
+            func=job["func"],
+            args=job["args"],
+            kwargs=job.get("kwargs", {}),
+            name=job["name"],
+            trigger=trigger,
+            executor="default",
+            misfire_grace_time=60 * 60,
+            coalesce=True,
+            max_instances=1,
+            next_run_time=trigger.get_next_fire_time(None, now),
+        )
+        new_job._jobstore_alias = "default"
+        new_jobs.append(new_job)
+    jobstore.add_jobs(new_jobs)
+    scheduler.wakeup()
+    LOGGER.info(f"Added {len(new_jobs)} jobs")
+
+
+CATCH_UP = {"started_at": None, "run_dates": [], "skipped": 0}
+
+
+async def start_scheduler() -> None:
+    """
+    Starts scheduler paused and resumes it after overdue jobs are spread by `catch_up_overdue_jobs`.
+    """
+    scheduler.start(paused=True)
+    try:
+        await catch_up_overdue_jobs()
+    finally:
+        scheduler.resume()
+
+
+async def catch_up_overdue_jobs() -> int:
+    """
+    Jobs that got overdue while chronograph was down would all run at the first scheduler wakeup.
+    Instead they're planned again in order of their due time, spread over CATCH_UP_WINDOW seconds
+    (or longer, not to start more than CATCH_UP_RATE jobs per second).
+    Jobs overdue by more than their misfire_grace_time are left to apscheduler to skip.
+    """
+    jobstore = jobstores["default"]
+    now = get_now()
+    if hasattr(jobstore, "get_due_jobs_async"):
+        jobs = await jobstore.get_due_jobs_async(now)
+    else:
+        jobs = jobstore.get_due_jobs(now)
+    overdue = [
+        job for job in jobs
+        if job.misfire_grace_time is None
+        or (now - job.next_run_time).total_seconds() <= job.misfire_grace_time
+    ]
+    overdue.sort(key=lambda job: job.next_run_time)
+    step = max(CATCH_UP_WINDOW / len(overdue), 1 / CATCH_UP_RATE) if overdue else 0
+    run_dates = []
+    for number, job in enumerate(overdue):
+        run_date = now + timedelta(seconds=step * number)
+        changes = {"next_run_time": run_date}
+        if isinstance(job.trigger, DateTrigger):
+            changes["trigger"] = DateTrigger(run_date, timezone=TZ)
+        job._modify(**changes)
+        run_dates.append(run_date)
+    if hasattr(jobstore, "add_jobs"):
+        jobstore.add_jobs(overdue)
+    else:
+        for job in overdue:
+            jobstore.update_job(job)
+    CATCH_UP.update(started_at=now, run_dates=run_dates, skipped=len(jobs) - len(overdue))
+    if overdue:
+        LOGGER.info(f"Catching up {len(overdue)} overdue jobs till {run_dates[-1].isoformat()}")
+    return len(overdue)
+
+
+def get_catch_up_progress() -> dict:
+    run_dates = CATCH_UP["run_dates"]
+    if CATCH_UP["started_at"] is None:
+        state = "idle"
+        dispatched = 0
+    else:
+        dispatched = bisect_right(run_dates, get_now())
+        state = "running" if dispatched < len(run_dates) else "done"
+    return {
+        "state": state,
+        "total": len(run_dates),
+        "dispatched": dispatched,
+        "skipped": CATCH_UP["skipped"],
+        "started_at": CATCH_UP["started_at"] and CATCH_UP["started_at"].isoformat(),
+        "ends_at": run_dates[-1].isoformat() if run_dates else None,
+    }
+
+
+async def plan_next_check(tender_id: str, next_check: str, server_id_cookie: str = None) -> Optional[dict]:
+    """
+    Returns recheck job for `add_jobs` or None if the job is already planned.
+    """
     LOGGER.info(f"Start processing tender: {tender_id}")
     job_id = f"recheck_{tender_id}"
     now = get_now()
     next_check = parse_date(next_check, TZ).astimezone(TZ)
-    run_date = now if now > next_check else next_check
-    scheduler.add_job(
-        push,
-        "date",
-        timezone=TZ,
+    run_date = get_check_date(tender_id, next_check, now)
+    if is_job_planned(await get_job(job_id), run_date, next_check < now):
+        LOGGER.info(f"Recheck job for tender {tender_id} already exists, don't set new")
+        return None
+    return dict(
+        func=push,
         id=job_id,
         name=f"Recheck {tender_id}",
-        run_date=run_date + timedelta(seconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
-        misfire_grace_time=60 * 60,
-        replace_existing=True,
-        args=["recheck", tender_id],
+        run_date=run_date,
+        args=["recheck", tender_id, server_id_cookie],
     )
 
 
+async def schedule_next_check(tender_id, next_check):
+    job = await plan_next_check(tender_id, next_check)
+    if job:
+        add_jobs([job])
+
+
 async def schedule_auction_planner(tender_id):
-    run_date = get_now() + timedelta(seconds=randint(SMOOTHING_MIN, SMOOTHING_MAX))
+    run_date = get_now() + get_jitter(tender_id)
+    if is_job_planned(await get_job(f"resync_{tender_id}"), run_date, earlier_is_enough=True):
+        LOGGER.info(f"Resync job for tender {tender_id} already exists, don't set new")
+        return
     scheduler.add_job(
         push,
         "date",
@@ -295,7 +689,6 @@ async def schedule_auction_planner(tender_id):
 async def process_listing(server_id_cookie: str, tender: dict) -> None:
     LOGGER.info(f"Start processing tender: {tender['id']}")
     run_date = get_now()
-    await check_auction(tender)
     tid = tender.get("id")
     next_check = tender.get("next_check")
 
@@ -310,19 +703,13 @@ async def process_listing(server_id_cookie: str, tender: dict) -> None:
             args=["recheck", tid, server_id_cookie],
         )
         next_check = parse_date(next_check, TZ).astimezone(TZ)
-        recheck_job = scheduler.get_job(f"recheck_{tid}")
-        if next_check < run_date:
-            scheduler.add_job(
-                push,
-                "date",
-                run_date=run_date + timedelta(seconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
-                **check_args,
-            )
-        elif not recheck_job or recheck_job.next_run_time != next_check:
+        check_date = get_check_date(tid, next_check, run_date)
+        recheck_job = await get_job(f"recheck_{tid}")
+        if not is_job_planned(recheck_job, check_date, next_check < run_date):
             scheduler.add_job(
                 push,
                 "date",
-                run_date=next_check + timedelta(seconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
+                run_date=check_date,
                 **check_args,
             )
     if any(
@@ -338,12 +725,13 @@ async def process_listing(server_id_cookie: str, tender: dict) -> None:
         > parse_date(tender["auctionPeriod"].get("startDate", "0001-01-03"), TZ)
     ):
         # moves to `schedule_auction_planner`
-        resync_job = scheduler.get_job(f"resync_{tid}")
-        if not resync_job or resync_job.next_run_time > run_date + timedelta(minutes=1):
+        resync_date = run_date + get_jitter(tid)
+        resync_job = await get_job(f"resync_{tid}")
+        if not is_job_planned(resync_job, resync_date, earlier_is_enough=True):
             scheduler.add_job(
                 push,
                 "date",
-                run_date=run_date + timedelta(seconds=randint(SMOOTHING_MIN, SMOOTHING_MAX)),
+                run_date=resync_date,
                 id=f"resync_{tid}",
                 name=f"Resync {tid}",
                 misfire_grace_time=60 * 60,
@@ -358,13 +746,16 @@ async def process_listing(server_id_cookie: str, tender: dict) -> None:
     await asyncio.sleep(1)
 
 
-async def recheck_tender(tender_id: str) -> datetime:
+async def recheck_tender(tender_id: str, server_id: str = None) -> datetime:
     url = f"{BASE_URL}/{tender_id}{URL_SUFFIX}"
     next_check = None
-    response = await SESSION.patch(
+    response = await request_api(
+        "patch",
         url,
+        server_id=server_id,
         json={"data": {"id": tender_id}},
     )
+    server_id = get_server_id(response, server_id)
     data = await response.text()
 
     if response.status == 429:
@@ -374,10 +765,11 @@ async def recheck_tender(tender_id: str) -> datetime:
         LOGGER.error("Error {} on checking tender '{}': {}".format(response.status, url, data))
         if response.status == 422:
             next_check = get_now() + timedelta(minutes=1)
-            response = await SESSION.get(url)
+            response = await request_api("get", url, server_id=server_id)
             data = await response.text()
             if response.status == 200:
-                data = json.loads(data)
+                with loop_monitor.span("recheck_tender:json.loads"):
+                    data = json.loads(data)
                 if data["data"]["status"] in INVALID_STATUSES:
                     status = data["data"]["status"]
                     tender_id = data["data"]["id"]
@@ -386,7 +778,8 @@ async def recheck_tender(tender_id: str) -> datetime:
         elif response.status not in (403, 404, 410):
             next_check = get_now() + timedelta(minutes=1)
     elif response.status == 200:
-        data = json.loads(data)
+        with loop_monitor.span("recheck_tender:json.loads"):
+            data = json.loads(data)
         if data["data"].get("next_check"):
             next_check = parse_date(data["data"]["next_check"], TZ).astimezone(TZ)
 
@@ -416,13 +809,14 @@ async def recheck_tender(tender_id: str) -> datetime:
     return next_check and next_check.isoformat()
 
 
-async def resync_tender(tender_id: str):
+async def resync_tender(tender_id: str, server_id: str = None):
     LOGGER.info(f"Start resyncing tender {tender_id}")
     url = f"{BASE_URL}/{tender_id}{URL_SUFFIX}"
     next_check = None
     next_sync = None
 
-    response = await SESSION.get(url)
+    response = await request_api("get", url, server_id=server_id)
+    server_id = get_server_id(response, server_id)
     data = await response.text()
 
     if response.status == 429:
@@ -446,13 +840,16 @@ async def resync_tender(tender_id: str):
             seconds=randint(SMOOTHING_REMIN, SMOOTHING_MAX)
         )
     else:
-        data = json.loads(data)
+        with loop_monitor.span("resync_tender:json.loads"):
+            data = json.loads(data)
         tender = data["data"]
         changes = await check_tender(tender)
         LOGGER.info(f"Changes to patch for tender {tender['id']}: {changes}")
         if changes:
-            response = await SESSION.patch(
+            response = await request_api(
+                "patch",
                 url,
+                server_id=server_id,
                 json={"data": changes},
             )
             data = await response.text()
@@ -476,7 +873,8 @@ async def resync_tender(tender_id: str):
                     seconds=randint(SMOOTHING_REMIN, SMOOTHING_MAX)
                 )
             else:
-                data = json.loads(data)
+                with loop_monitor.span("resync_tender:json.loads"):
+                    data = json.loads(data)
                 if data and data["data"].get("next_check"):
                     next_check = parse_date(data["data"]["next_check"], TZ).astimezone(
                         TZ
@@ -0,0 +1,69 @@
+from typing import Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+
+class APISession:
+    """
+    ClientSession for API requests, created on first use inside the running loop
+    (and created again if it was closed), with connection pool and timeouts from settings.
+    """
+
+    def __init__(
+        self,
+        headers: dict,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+        dns_cache_ttl: int,
+        connect_timeout: float,
+        read_timeout: float,
+    ):
+        self.headers = headers
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.requests = 0
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+        return self._session
+
+    @property
+    def cookie_jar(self):
+        return self.session.cookie_jar
+
+    async def get(self, url: str, **kwargs):
+        self.requests += 1
+        return await self.session.get(url, **kwargs)
+
+    async def patch(self, url: str, **kwargs):
+        self.requests += 1
+        return await self.session.patch(url, **kwargs)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> dict:
+        connector = self._session.connector if self._session is not None and not self._session.closed else None
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "requests": self.requests,
+            # aiohttp doesn't expose pool usage, so it's taken from connector internals
+            "in_use": len(getattr(connector, "_acquired", ())),
+            "idle": sum(len(i) for i in getattr(connector, "_conns", {}).values()),
+        }
@@ -1,21 +1,61 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ReturnDocument, UpdateOne, ASCENDING
+from pymongo.errors import DuplicateKeyError
 from datetime import timedelta, datetime, time
+from time import monotonic
+import sys
 import standards
-from typing import Tuple
+from typing import Tuple, List
 
 from prozorro_chronograph.settings import (
     MONGODB_PLANS_COLLECTION,
     MONGODB_CONFIG_COLLECTION,
+    MONGODB_SLOTS_COLLECTION,
+    MONGODB_TENDER_SLOTS_COLLECTION,
+    MONGODB_DEADLETTER_COLLECTION,
     MONGODB_DATABASE,
     MONGODB_URL,
     WORKING_DAY_START,
     TZ,
     STREAMS,
     LOGGER,
+    CONFIG_CACHE_TTL,
+    TENDER_SLOTS_FILTER_TTL,
+    PLANS_LAYOUT,
 )
-from prozorro_chronograph.utils import parse_date
+from prozorro_chronograph.metrics import MONGODB_CALLS
+from prozorro_chronograph.utils import parse_date, get_now
 
 DB_CONNECTION = None
+CONFIG_CACHE = None
+TENDER_SLOTS = None
+TENDER_SLOTS_REFRESHED_AT = None
+FULL_DAYS = set()
+FULL_DAYS_STREAMS = None
+FULL_DAYS_STATS = {"hits": 0, "misses": 0}
+MONGODB_OPERATIONS = frozenset((
+    "find", "find_one", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+    "bulk_write", "count_documents", "estimated_document_count", "aggregate", "distinct",
+    "create_index", "create_indexes",
+))
+
+
+class CountedCollection:
+    """
+    Collection proxy that counts operations (MONGODB_CALLS metric) by storage function that has got it.
+    """
+
+    __slots__ = ("collection", "function")
+
+    def __init__(self, collection: AsyncIOMotorCollection, function: str):
+        self.collection = collection
+        self.function = function
+
+    def __getattr__(self, name):
+        if name in MONGODB_OPERATIONS:
+            MONGODB_CALLS.inc(self.function, name)
+        return getattr(self.collection, name)
 
 
 def get_mongodb_collection(collection_name: str = MONGODB_PLANS_COLLECTION) -> AsyncIOMotorCollection:
@@ -23,7 +63,7 @@ def get_mongodb_collection(collection_name: str = MONGODB_PLANS_COLLECTION) -> A
     DB_CONNECTION = DB_CONNECTION or AsyncIOMotorClient(MONGODB_URL)
     db = getattr(DB_CONNECTION, MONGODB_DATABASE)
     collection = getattr(db, collection_name)
-    return collection
+    return CountedCollection(collection, sys._getframe(1).f_code.co_name)
 
 
 async def init_plans_collection() -> None:
@@ -48,115 +88,367 @@ async def init_database() -> None:
         streams = existing_doc["streams"]
     await collection.update_one(
         {"_id": "config"},
-        {"$set": {"working_days": working_days, "streams": streams}},
+        {
+            "$set": {"working_days": working_days, "streams": streams},
+            "$inc": {"version": 1},
+        },
         upsert=True,
     )
+    invalidate_config_cache()
+    if PLANS_LAYOUT == "flat":
+        await init_slots_collection()
+    await init_tender_slots_collection()
 
 
-async def get_calendar() -> dict:
+async def init_slots_collection() -> None:
+    collection = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+    # first free slot of the day, ordered as planner walks streams
+    await collection.create_index([
+        ("mode", ASCENDING),
+        ("date", ASCENDING),
+        ("tender_id", ASCENDING),
+        ("stream_id", ASCENDING),
+        ("time", ASCENDING),
+    ])
+    # slots of tender
+    await collection.create_index([("tender_id", ASCENDING)])
+
+
+async def init_tender_slots_collection() -> None:
+    collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+    await collection.create_index([("tender_id", ASCENDING)])
+    await collection.create_index([("reserved_at", ASCENDING)])
+    if await collection.estimated_document_count() == 0:
+        await rebuild_tender_slots()
+
+
+async def rebuild_tender_slots() -> int:
+    """
+    Fills tender_id -> slots index from plans (used once for existing databases).
+    """
+    collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+    count = 0
+    if PLANS_LAYOUT == "flat":
+        slots = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+        async for slot in slots.find({"tender_id": {"$ne": None}}):
+            plan_id = get_plan_id(slot["mode"], slot["date"])
+            await add_tender_slot(plan_id, slot["stream_id"], slot["time"], slot["tender_id"], slot["lot_id"])
+            count += 1
+    else:
+        plans = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
+        async for plan in plans.find({"streams.slots.tender_id": {"$ne": None}}):
+            for stream in plan["streams"]:
+                for slot in stream["slots"]:
+                    if slot["tender_id"] is not None:
+                        await add_tender_slot(
+                            plan["_id"], stream["stream_id"], slot["time"], slot["tender_id"], slot["lot_id"]
+                        )
+                        count += 1
+    LOGGER.info(f"Index {collection.name} rebuilt with {count} slots")
+    return count
+
+
+def invalidate_config_cache() -> None:
+    global CONFIG_CACHE
+    CONFIG_CACHE = None
+
+
+async def get_config() -> dict:
+    """
+    Returns config document from in-process cache.
+    Every write to config increments its `version`, so once in CONFIG_CACHE_TTL seconds
+    only `version` is fetched, and the whole document is reloaded only when it has changed
+    (e.g. holidays were updated by another replica).
+    """
+    global CONFIG_CACHE
+    now = monotonic()
+    if CONFIG_CACHE is not None and now - CONFIG_CACHE["checked_at"] < CONFIG_CACHE_TTL:
+        return CONFIG_CACHE
+
     collection = get_mongodb_collection(MONGODB_CONFIG_COLLECTION)
-    calendar = await collection.find_one({"_id": "config"})
-    return calendar["working_days"]
+    if CONFIG_CACHE is not None:
+        config = await collection.find_one({"_id": "config"}, {"version": 1})
+        if config and config.get("version") == CONFIG_CACHE["version"]:
+            CONFIG_CACHE["checked_at"] = now
+            return CONFIG_CACHE
+
+    config = await collection.find_one({"_id": "config"}) or {}
+    LOGGER.info(f"Config version {config.get('version')} loaded to cache")
+    CONFIG_CACHE = {
+        "version": config.get("version"),
+        "working_days": config.get("working_days", {}),
+        "streams": config.get("streams") or 10,
+        "checked_at": now,
+    }
+    return CONFIG_CACHE
+
+
+async def get_calendar() -> dict:
+    config = await get_config()
+    return config["working_days"]
 
 
 async def set_holiday(day: str) -> None:
     collection = get_mongodb_collection(MONGODB_CONFIG_COLLECTION)
     key = parse_date(day).date().isoformat()
     await collection.update_one(
-        {"_id": "config"}, {"$set": {f"working_days.{key}": True}}, upsert=True
+        {"_id": "config"},
+        {"$set": {f"working_days.{key}": True}, "$inc": {"version": 1}},
+        upsert=True,
     )
+    invalidate_config_cache()
 
 
 async def delete_holiday(day: str) -> None:
     collection = get_mongodb_collection(MONGODB_CONFIG_COLLECTION)
     key = parse_date(day).date().isoformat()
     await collection.update_one(
-        {"_id": "config"}, {"$unset": {f"working_days.{key}": ""}}
+        {"_id": "config"},
+        {"$unset": {f"working_days.{key}": ""}, "$inc": {"version": 1}},
     )
+    invalidate_config_cache()
 
 
 async def get_streams() -> int:
-    collection = get_mongodb_collection(MONGODB_CONFIG_COLLECTION)
-    config = await collection.find_one({"_id": "config"}, {"streams": 1})
-    if not config or not config.get("streams", None):
-        config = {"streams": 10}
+    config = await get_config()
     return config["streams"]
 
 
+def get_plan_id(mode: str, date) -> str:
+    date = date if isinstance(date, str) else date.isoformat()
+    return f"plan{mode}_{date}"
+
+
+def parse_plan_id(plan_id: str) -> Tuple[str, str]:
+    mode, date = plan_id[len("plan"):].split("_")
+    return mode, date
+
+
+def get_slot_id(plan_id: str, stream_id: int, slot_time: str) -> str:
+    return f"{plan_id}_{stream_id}_{slot_time}"
+
+
 async def get_date(mode: str, date: datetime) -> Tuple[time, int, dict]:
-    plan_id = f"plan{mode}_{date.isoformat()}"
+    plans = await get_dates(mode, [date])
+    return plans[date]
+
+
+async def get_dates(mode: str, dates: list) -> dict:
+    """
+    Fetches plans of several days with one query.
+    Returns {date: (plan time, streams count, plan)} for each of `dates`.
+    """
+    plan_ids = {get_plan_id(mode, date): date for date in dates}
     collection = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
-    plan = await collection.find_one({"_id": plan_id})
-    if plan is None:
-        plan = {"_id": plan_id}
-    plan_date_end = plan.get("time", WORKING_DAY_START.isoformat())
-    plan_date = parse_date(date.isoformat() + "T" + plan_date_end, None)
-    plan_date = plan_date.astimezone(TZ) if plan_date.tzinfo else TZ.localize(plan_date)
-    return plan_date.time(), plan.get("streams_count", 1), plan
+    projection = {"streams": 0} if PLANS_LAYOUT == "flat" else None
+    plans = {
+        plan["_id"]: plan
+        async for plan in collection.find({"_id": {"$in": list(plan_ids)}}, projection)
+    }
+    if PLANS_LAYOUT == "flat":
+        free_streams = await get_flat_free_streams(mode, dates)
+    result = {}
+    for plan_id, date in plan_ids.items():
+        plan = plans.get(plan_id, {"_id": plan_id})
+        if PLANS_LAYOUT == "flat":
+            plan["streams"] = free_streams.get(date.isoformat(), [])
+        plan_date_end = plan.get("time", WORKING_DAY_START.isoformat())
+        plan_date = parse_date(date.isoformat() + "T" + plan_date_end, None)
+        plan_date = plan_date.astimezone(TZ) if plan_date.tzinfo else TZ.localize(plan_date)
+        result[date] = (plan_date.time(), plan.get("streams_count", 1), plan)
+    return result
+
+
+async def get_flat_free_streams(mode: str, dates: list) -> dict:
+    """
+    Returns first free slot of each day in shape of plan `streams`,
+    so `find_free_slot` works the same way for both layouts.
+    """
+    collection = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+    free_streams = {}
+    async for day in collection.aggregate([
+        {"$match": {"mode": mode, "date": {"$in": [i.isoformat() for i in dates]}, "tender_id": None}},
+        {"$sort": {"date": 1, "stream_id": 1, "time": 1}},
+        {"$group": {"_id": "$date", "stream_id": {"$first": "$stream_id"}, "time": {"$first": "$time"}}},
+    ]):
+        free_streams[day["_id"]] = [{
+            "stream_id": day["stream_id"],
+            "slots": [{"tender_id": None, "lot_id": None, "time": day["time"]}],
+        }]
+    return free_streams
 
 
-async def set_date(
-        plan_id: str,
+def is_day_full(mode: str, date: datetime, streams: int) -> bool:
+    """
+    Checks process-local cache of days that are known to be fully booked.
+    Cache is dropped when number of streams changes.
+    """
+    global FULL_DAYS_STREAMS
+    if streams != FULL_DAYS_STREAMS:
+        FULL_DAYS.clear()
+        FULL_DAYS_STREAMS = streams
+    if (mode, date.isoformat()) in FULL_DAYS:
+        FULL_DAYS_STATS["hits"] += 1
+        return True
+    FULL_DAYS_STATS["misses"] += 1
+    return False
+
+
+def mark_day_full(mode: str, date: datetime) -> None:
+    FULL_DAYS.add((mode, date.isoformat()))
+
+
+def get_full_days_stats() -> dict:
+    return {"size": len(FULL_DAYS), **FULL_DAYS_STATS}
+
+
+async def reserve_slot(
+        plan: dict,
+        stream_id: int,
+        tender_id: str,
+        lot_id: str,
+        start_time: time,
         end_time: time,
+        new_slot: bool = True) -> bool:
+    """
+    Claims slot in plan with one conditional update.
+    Freed slot is claimed only while it's still free. New slot is appended only while plan
+    `time` and `streams_count` are the same as in `plan` that was read by planner,
+    as every new slot moves them forward.
+    Returns False on conflict with concurrent planning, so caller should read plan again.
+    """
+    entry_id = await add_tender_slot(plan["_id"], stream_id, start_time.isoformat(), tender_id, lot_id)
+    if PLANS_LAYOUT == "flat":
+        reserved = await reserve_flat_slot(plan, stream_id, tender_id, lot_id, start_time, end_time, new_slot)
+    else:
+        reserved = await reserve_nested_slot(plan, stream_id, tender_id, lot_id, start_time, end_time, new_slot)
+    if not reserved:
+        await remove_tender_slots([entry_id])
+    return reserved
+
+
+async def reserve_nested_slot(
+        plan: dict,
         stream_id: int,
         tender_id: str,
         lot_id: str,
         start_time: time,
-        new_slot: bool = True) -> None:
+        end_time: time,
+        new_slot: bool = True) -> bool:
     collection = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
-
-    if new_slot:
-        time = end_time.isoformat()
-        await collection.update_one(
-            {"_id": plan_id},
-            {"$set": {"time": time, "streams_count": stream_id}},
-            upsert=True,
+    plan_id = plan["_id"]
+    slot_time = start_time.isoformat()
+    upsert = False
+    if not new_slot:
+        query = {
+            "_id": plan_id,
+            "streams": {"$elemMatch": {
+                "stream_id": stream_id,
+                "slots": {"$elemMatch": {"time": slot_time, "tender_id": None}},
+            }},
+        }
+        update = {"$set": {
+            "streams.$[stream].slots.$[slot].tender_id": tender_id,
+            "streams.$[stream].slots.$[slot].lot_id": lot_id,
+        }}
+        array_filters = [
+            {"stream.stream_id": stream_id},
+            {"slot.time": slot_time, "slot.tender_id": None},
+        ]
+    else:
+        query = {
+            "_id": plan_id,
+            "time": plan.get("time", {"$exists": False}),
+            "streams_count": plan.get("streams_count", {"$exists": False}),
+        }
+        upsert = "time" not in plan
+        slot = {"tender_id": tender_id, "lot_id": lot_id, "time": slot_time}
+        update = {"$set": {"time": end_time.isoformat(), "streams_count": stream_id}}
+        if any(i["stream_id"] == stream_id for i in plan.get("streams", [])):
+            update["$push"] = {"streams.$[stream].slots": slot}
+            array_filters = [{"stream.stream_id": stream_id}]
+        else:
+            update["$push"] = {"streams": {"stream_id": stream_id, "slots": [slot]}}
+            array_filters = None
+    try:
+        result = await collection.find_one_and_update(
+            query,
+            update,
+            projection={"_id": 1},
+            array_filters=array_filters,
+            upsert=upsert,
+            return_document=ReturnDocument.AFTER,
         )
-    streams = await collection.find_one(
-        {"_id": plan_id, "streams.stream_id": stream_id}
-    )
-    default_slot = {
-        "tender_id": tender_id,
-        "lot_id": lot_id,
-        "time": start_time.isoformat(),
-    }
-    if streams is None:
-        new_stream = {"stream_id": stream_id, "slots": [default_slot]}
-        await collection.update_one(
-            {"_id": plan_id}, {"$push": {"streams": new_stream}}
+    except DuplicateKeyError:
+        result = None
+    if result is None:
+        LOGGER.info(f"Slot {slot_time} in stream {stream_id} of {plan_id} was taken by concurrent planning")
+        return False
+    LOGGER.info(f"Reserved slot {slot_time} in stream {stream_id} of {plan_id} for tender {tender_id}")
+    return True
+
+
+async def reserve_flat_slot(
+        plan: dict,
+        stream_id: int,
+        tender_id: str,
+        lot_id: str,
+        start_time: time,
+        end_time: time,
+        new_slot: bool = True) -> bool:
+    plan_id = plan["_id"]
+    slot_time = start_time.isoformat()
+    slot_id = get_slot_id(plan_id, stream_id, slot_time)
+    slots_collection = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+    if not new_slot:
+        result = await slots_collection.find_one_and_update(
+            {"_id": slot_id, "tender_id": None},
+            {"$set": {"tender_id": tender_id, "lot_id": lot_id}},
+            projection={"_id": 1},
         )
     else:
-        LOGGER.info(f"Finding slot for {tender_id}")
-        for num, stream in enumerate(streams["streams"]):
-            if stream["stream_id"] == stream_id:
-                modified = False
-                LOGGER.info(f"Finding slot for {tender_id} in {stream['slots']}")
-                for slot in stream["slots"]:
-                    if slot["time"] == start_time.isoformat():
-                        slot["tender_id"] = tender_id
-                        slot["lot_id"] = lot_id
-                        modified = True
-                        LOGGER.info(f"Slot was found {slot} for tender: {tender_id}")
-                        break
-                if not modified:
-                    LOGGER.info(f"Slot was not found for tender: {tender_id} setting default {default_slot}")
-                    stream["slots"].append(default_slot)
-                break
-        LOGGER.info(f"Setting tender {tender_id} in stream {stream_id}, with value {stream}")
-        await collection.update_one(
-            {"_id": plan_id, "streams.stream_id": stream_id},
-            {"$set": {f"streams.$": stream}},
-        )
+        collection = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
+        try:
+            result = await collection.find_one_and_update(
+                {
+                    "_id": plan_id,
+                    "time": plan.get("time", {"$exists": False}),
+                    "streams_count": plan.get("streams_count", {"$exists": False}),
+                },
+                {"$set": {"time": end_time.isoformat(), "streams_count": stream_id}},
+                projection={"_id": 1},
+                upsert="time" not in plan,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            result = None
+        if result is not None:
+            mode, date = parse_plan_id(plan_id)
+            await slots_collection.replace_one(
+                {"_id": slot_id},
+                {
+                    "mode": mode,
+                    "date": date,
+                    "time": slot_time,
+                    "stream_id": stream_id,
+                    "tender_id": tender_id,
+                    "lot_id": lot_id,
+                },
+                upsert=True,
+            )
+    if result is None:
+        LOGGER.info(f"Slot {slot_time} in stream {stream_id} of {plan_id} was taken by concurrent planning")
+        return False
+    LOGGER.info(f"Reserved slot {slot_time} in stream {stream_id} of {plan_id} for tender {tender_id}")
+    return True
 
 
 def find_free_slot(plan: dict) -> Tuple[datetime, int]:
-    streams_count = plan.get("streams_count", 0)
-    for stream_id in range(streams_count):
-        streams = plan.get("streams", [])
-        if not streams:
-            LOGGER.info(f"Plan {plan['_id']} have no streams")
-            break
-        for slot in streams[stream_id].get("slots", []):
+    streams = plan.get("streams", [])
+    if not streams:
+        LOGGER.info(f"Plan {plan['_id']} have no streams")
+    for stream in streams:
+        for slot in stream.get("slots", []):
             LOGGER.info(f"Checking slot {slot}")
             if slot["tender_id"] is None:
                 plan_date = parse_date(
@@ -167,8 +459,7 @@ def find_free_slot(plan: dict) -> Tuple[datetime, int]:
                     if plan_date.tzinfo
                     else TZ.localize(plan_date)
                 )
-                current_stream = plan["streams"][stream_id]["stream_id"]
-                return plan_date, current_stream
+                return plan_date, stream["stream_id"]
     LOGGER.info(f"Slot was not found")
 
 
@@ -187,33 +478,175 @@ def check_slot_to_be_free(lot_id: str, auction_time: datetime, lots: dict, plan_
     return False
 
 
+async def add_tender_slot(plan_id: str, stream_id: int, slot_time: str, tender_id: str, lot_id: str) -> str:
+    """
+    Adds slot to tender_id -> slots index. Entry is written before slot is reserved,
+    so a slot never stays owned without being indexed. Stale entries are harmless,
+    as slots are released only while they're still owned by the tender.
+    """
+    global TENDER_SLOTS
+    collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+    entry_id = f"{get_slot_id(plan_id, stream_id, slot_time)}_{tender_id}"
+    await collection.replace_one(
+        {"_id": entry_id},
+        {
+            "tender_id": tender_id,
+            "plan_id": plan_id,
+            "stream_id": stream_id,
+            "time": slot_time,
+            "lot_id": lot_id,
+            "reserved_at": get_now(),
+        },
+        upsert=True,
+    )
+    if TENDER_SLOTS is not None:
+        TENDER_SLOTS.add(tender_id)
+    return entry_id
+
+
+async def remove_tender_slots(entry_ids: list) -> None:
+    collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+    await collection.delete_many({"_id": {"$in": entry_ids}})
+
+
+async def get_tender_slots_filter() -> set:
+    """
+    In-memory set of tender ids that may own slots, so most of the feed doesn't touch database.
+    Set is loaded once, then new entries (including ones made by other processes)
+    are fetched by `reserved_at` once in TENDER_SLOTS_FILTER_TTL seconds.
+    """
+    global TENDER_SLOTS, TENDER_SLOTS_REFRESHED_AT
+    now = get_now()
+    if TENDER_SLOTS is None:
+        collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+        TENDER_SLOTS = set(await collection.distinct("tender_id"))
+        TENDER_SLOTS_REFRESHED_AT = now
+        LOGGER.info(f"Loaded {len(TENDER_SLOTS)} tenders with reserved slots")
+    elif (now - TENDER_SLOTS_REFRESHED_AT).total_seconds() >= TENDER_SLOTS_FILTER_TTL:
+        # margin covers clock difference between replicas
+        since = TENDER_SLOTS_REFRESHED_AT - timedelta(seconds=TENDER_SLOTS_FILTER_TTL)
+        collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+        async for entry in collection.find({"reserved_at": {"$gte": since}}, {"tender_id": 1}):
+            TENDER_SLOTS.add(entry["tender_id"])
+        TENDER_SLOTS_REFRESHED_AT = now
+    return TENDER_SLOTS
+
+
+async def has_tender_slots(tender_id: str) -> bool:
+    return tender_id in await get_tender_slots_filter()
+
+
+def get_tender_slot_time(entry: dict) -> datetime:
+    plan_time = entry["plan_id"].split("_")[1] + "T" + entry["time"]
+    return TZ.localize(parse_date(plan_time, None))
+
+
 async def free_slots(tender_id: str, auction_time: datetime, lots: dict) -> None:
+    await free_slots_batch([(tender_id, auction_time, lots)])
+
+
+async def free_slots_batch(tenders: List[Tuple[str, datetime, dict]]) -> None:
+    """
+    Releases slots of feed page tenders, that are not used by their auctions anymore.
+    Takes list of (tender_id, auction_time, lots) and makes constant number of requests:
+    one fetch from tender slots index, one unordered bulk write to plans and one delete from index.
+    """
+    tender_slots = await get_tender_slots_filter()
+    tenders = {
+        tender_id: (auction_time, lots)
+        for tender_id, auction_time, lots in tenders
+        if tender_id in tender_slots
+    }
+    if not tenders:
+        return
+    collection = get_mongodb_collection(MONGODB_TENDER_SLOTS_COLLECTION)
+    entries = await collection.find({"tender_id": {"$in": list(tenders)}}).to_list(None)
+    released = []
+    kept_tenders = set()
+    for entry in entries:
+        auction_time, lots = tenders[entry["tender_id"]]
+        if check_slot_to_be_free(
+            lot_id=entry["lot_id"],
+            auction_time=auction_time,
+            lots=lots,
+            plan_time=get_tender_slot_time(entry),
+        ):
+            released.append(entry)
+        else:
+            kept_tenders.add(entry["tender_id"])
+    if released:
+        if PLANS_LAYOUT == "flat":
+            await release_flat_slots(released)
+        else:
+            await release_nested_slots(released)
+        await remove_tender_slots([entry["_id"] for entry in released])
+        for entry in released:
+            FULL_DAYS.discard(parse_plan_id(entry["plan_id"]))
+    for tender_id in tenders:
+        if tender_id not in kept_tenders:
+            tender_slots.discard(tender_id)
+
+
+async def release_nested_slots(entries: list) -> None:
     collection = get_mongodb_collection(MONGODB_PLANS_COLLECTION)
+    await collection.bulk_write(
+        [
+            UpdateOne(
+                {"_id": entry["plan_id"]},
+                {"$set": {
+                    "streams.$[stream].slots.$[slot].tender_id": None,
+                    "streams.$[stream].slots.$[slot].lot_id": None,
+                }},
+                array_filters=[
+                    {"stream.stream_id": entry["stream_id"]},
+                    {"slot.time": entry["time"], "slot.tender_id": entry["tender_id"]},
+                ],
+            )
+            for entry in entries
+        ],
+        ordered=False,
+    )
 
-    async for doc in collection.aggregate(
+
+async def release_flat_slots(entries: list) -> None:
+    collection = get_mongodb_collection(MONGODB_SLOTS_COLLECTION)
+    await collection.bulk_write(
         [
-            {"$match": {"streams.slots.tender_id": tender_id}},
-            {"$unwind": "$streams"},
-            {"$match": {"streams.slots.tender_id": tender_id}},
-            {"$project": {"streams": 1}},
+            UpdateOne(
+                {
+                    "_id": get_slot_id(entry["plan_id"], entry["stream_id"], entry["time"]),
+                    "tender_id": entry["tender_id"],
+                },
+                {"$set": {"tender_id": None, "lot_id": None}},
+            )
+            for entry in entries
         ],
-    ):
-        streams = doc["streams"]
-        plan_id = doc["_id"]
-        stream_id = streams["stream_id"]
-        for slot in streams["slots"]:
-            if slot["tender_id"] is not None and slot["tender_id"].startswith(tender_id):
-                plan_time = doc["_id"].split("_")[1] + "T" + slot["time"]
-                plan_time = TZ.localize(parse_date(plan_time, None))
-                if check_slot_to_be_free(
-                    lot_id=slot["lot_id"],
-                    auction_time=auction_time,
-                    lots=lots,
-                    plan_time=plan_time,
-                ):
-                    slot["tender_id"] = None
-                    slot["lot_id"] = None
-        await collection.update_one(
-            {"_id": plan_id, "streams.stream_id": stream_id},
-            {"$set": {"streams.$.slots": streams["slots"]}},
-        )
+        ordered=False,
+    )
+
+
+async def add_dead_letter(mode: str, tender_id: str, server_id: str, attempts: int, error: str) -> None:
+    collection = get_mongodb_collection(MONGODB_DEADLETTER_COLLECTION)
+    await collection.replace_one(
+        {"_id": f"{mode}_{tender_id}"},
+        {
+            "mode": mode,
+            "tender_id": tender_id,
+            "server_id": server_id,
+            "attempts": attempts,
+            "error": error,
+            "failed_at": get_now().isoformat(),
+        },
+        upsert=True,
+    )
+
+
+async def get_dead_letters(ids: list = None, limit: int = 0) -> list:
+    collection = get_mongodb_collection(MONGODB_DEADLETTER_COLLECTION)
+    query = {"_id": {"$in": ids}} if ids is not None else {}
+    return await collection.find(query, sort=[("failed_at", ASCENDING)], limit=limit).to_list(None)
+
+
+async def remove_dead_letters(ids: list) -> None:
+    collection = get_mongodb_collection(MONGODB_DEADLETTER_COLLECTION)
+    await collection.delete_many({"_id": {"$in": ids}})
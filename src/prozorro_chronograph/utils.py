@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from random import randint
+from zlib import crc32
 from ciso8601 import parse_datetime
 from pytz import timezone, utc
 from typing import Optional
@@ -11,6 +12,8 @@ from prozorro_chronograph.settings import (
     MIN_PAUSE,
     ROUNDING,
     WORKING_DAY_START,
+    SMOOTHING_MIN,
+    SMOOTHING_MAX,
 )
 
 
@@ -22,6 +25,15 @@ def randomize(dt: datetime) -> datetime:
     return dt + timedelta(seconds=randint(0, 1799))
 
 
+def get_jitter(*keys, low: int = SMOOTHING_MIN, high: int = SMOOTHING_MAX) -> timedelta:
+    """
+    Returns stable jitter in [low, high] seconds for `keys`,
+    so the job of the same tender and next_check is always planned at the same time.
+    """
+    digest = crc32("_".join(str(key) for key in keys).encode())
+    return timedelta(seconds=low + digest % (high - low + 1))
+
+
 def calc_auction_end_time(bids: int, start: datetime) -> datetime:
     end = start + bids * BIDDER_TIME + SERVICE_TIME + MIN_PAUSE
     seconds = (end - TZ.localize(datetime.combine(end, WORKING_DAY_START))).seconds
@@ -0,0 +1,89 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import List
+
+from prozorro_chronograph.settings import WORKING_DAYS_INDEX_YEARS
+from prozorro_chronograph.utils import get_now
+
+WORKING_DAYS_INDEX = None
+
+
+class WorkingDaysIndex:
+    """
+    Sorted ordinals of working days (not weekend and not in `calendar`)
+    from the beginning of previous year for WORKING_DAYS_INDEX_YEARS years.
+    Days out of this range are checked one by one.
+    """
+
+    def __init__(self, calendar: dict, start: date, end: date):
+        self.calendar = calendar
+        self.start = start.toordinal()
+        self.end = end.toordinal()
+        self.days = [
+            ordinal for ordinal in range(self.start, self.end)
+            if self._is_working_day(date.fromordinal(ordinal))
+        ]
+
+    def _is_working_day(self, day: date) -> bool:
+        return not self.calendar.get(day.isoformat()) and day.weekday() not in [
+            5,
+            6,
+        ]  # skip Saturday and Sunday
+
+    def _in_range(self, day: date) -> bool:
+        return self.start <= day.toordinal() and (not self.days or day.toordinal() <= self.days[-1])
+
+    def is_working_day(self, day: date) -> bool:
+        if not self._in_range(day):
+            return self._is_working_day(day)
+        i = bisect_left(self.days, day.toordinal())
+        return i < len(self.days) and self.days[i] == day.toordinal()
+
+    def next_working_day(self, day: date) -> date:
+        """
+        Returns first working day on or after `day`.
+        """
+        if not self._in_range(day):
+            while not self._is_working_day(day):
+                day += timedelta(days=1)
+            return day
+        return date.fromordinal(self.days[bisect_left(self.days, day.toordinal())])
+
+    def nth_working_day_after(self, day: date, n: int) -> date:
+        """
+        Returns n-th working day after `day` (n=1 is the next working day after `day`).
+        """
+        i = bisect_right(self.days, day.toordinal()) + n - 1
+        if not self._in_range(day) or i >= len(self.days):
+            for _ in range(n):
+                day = self.next_working_day(day + timedelta(days=1))
+            return day
+        return date.fromordinal(self.days[i])
+
+    def working_days(self, day: date, count: int) -> List[date]:
+        """
+        Returns `count` working days starting on or after `day`.
+        """
+        i = bisect_left(self.days, day.toordinal())
+        if not self._in_range(day) or i + count > len(self.days):
+            days = [self.next_working_day(day)]
+            while len(days) < count:
+                days.append(self.nth_working_day_after(days[-1], 1))
+            return days
+        return [date.fromordinal(i) for i in self.days[i:i + count]]
+
+
+def get_working_days_index(calendar: dict) -> WorkingDaysIndex:
+    """
+    Returns index for `calendar`. Config cache returns the same `working_days` dict
+    until config is changed, so index is rebuilt only when holidays change.
+    """
+    global WORKING_DAYS_INDEX
+    if WORKING_DAYS_INDEX is None or WORKING_DAYS_INDEX.calendar is not calendar:
+        today = get_now().date()
+        WORKING_DAYS_INDEX = WorkingDaysIndex(
+            calendar,
+            start=date(today.year - 1, 1, 1),
+            end=date(today.year + WORKING_DAYS_INDEX_YEARS, 1, 1),
+        )
+    return WORKING_DAYS_INDEX
@@ -13,7 +13,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 from prozorro_chronograph.api import create_app
 from prozorro_chronograph.settings import scheduler
-from prozorro_chronograph.storage import init_database
+from prozorro_chronograph.storage import init_database, FULL_DAYS
 from prozorro_chronograph.utils import get_now
 from .api_data import test_tender_data
 from prozorro_crawler.settings import CRAWLER_USER_AGENT
@@ -60,6 +60,7 @@ class BaseTest:
         yield db
         event_loop.run_until_complete(db.plans.delete_many({}))
         event_loop.run_until_complete(db.config.delete_many({}))
+        FULL_DAYS.clear()
         mongo.close()
 
 
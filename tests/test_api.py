@@ -3,7 +3,7 @@ from unittest.mock import patch, MagicMock
 from freezegun import freeze_time
 
 from prozorro_chronograph.utils import get_now
-from prozorro_chronograph.scheduler import recheck_tender, resync_tender
+from prozorro_chronograph.scheduler import push
 from prozorro_chronograph.settings import TZ, SMOOTHING_MAX, SMOOTHING_MIN
 from .base import BaseTest, working_days
 
@@ -26,13 +26,13 @@ class TestSimple(BaseTest):
         assert data is None
         mock_randint.assert_called_once_with(SMOOTHING_MIN, SMOOTHING_MAX)
         mock_add_job.assert_called_once_with(
-            resync_tender,
+            push,
             run_date=get_now() + timedelta(milliseconds=20),
             misfire_grace_time=3600,
             replace_existing=True,
             name='Resync from api',
             id='resync_api_all',
-            args=['all']
+            args=['resync', 'all']
         )
 
     @freeze_time("2012-01-14")
@@ -45,13 +45,13 @@ class TestSimple(BaseTest):
         assert data is None
         mock_randint.assert_called_once_with(SMOOTHING_MIN, SMOOTHING_MAX)
         mock_add_job.assert_called_once_with(
-            recheck_tender,
+            push,
             run_date=get_now() + timedelta(milliseconds=20),
             misfire_grace_time=3600,
             replace_existing=True,
             name='Recheck from api',
             id='recheck_api_all',
-            args=['all']
+            args=['recheck', 'all']
         )
 
 
@@ -85,3 +85,11 @@ class TestSimple(BaseTest):
             response = await cli.get("/calendar")
             data = await response.json()
             assert "2021-05-11" not in data["working_days"]
+
+    async def test_stats(self, cli):
+        response = await cli.get("/stats")
+        assert response.status == 200
+        data = await response.json()
+        assert set(data["full_days"]) == {"size", "hits", "misses"}
+        assert set(data["rate_limiter"]) == {"rate", "ceiling", "queue", "throttled"}
+        assert set(data["session"]) == {"limit", "limit_per_host", "requests", "in_use", "idle"}
@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from aiohttp import ClientError
+
+from prozorro_chronograph.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from prozorro_chronograph.executor import BoundedAsyncIOExecutor
+from prozorro_chronograph.scheduler import request_api, on_breaker_state
+from prozorro_chronograph.settings import scheduler, breaker
+from prozorro_chronograph.utils import get_now
+from .test_executor import create_job, STARTED
+
+
+@pytest.mark.asyncio
+class TestCircuitBreaker:
+    async def test_open_half_open_close(self):
+        cb = CircuitBreaker(window=4, error_rate=0.5, open_time=0.01, probes=2, ramp_time=60)
+        states = []
+        cb.add_listener(states.append)
+        for ok in (True, False, True):
+            cb.record(ok)
+        assert cb.state == CLOSED  # window isn't full yet
+        cb.record(False)
+        assert cb.state == OPEN
+        assert cb.get_limit(10) == 0
+
+        await asyncio.sleep(0.02)
+        assert cb.state == HALF_OPEN
+        assert cb.get_limit(10) == 2
+        assert cb.get_limit(1) == 1
+        cb.record(False)
+        assert cb.state == OPEN
+
+        await asyncio.sleep(0.02)
+        cb.record(True)
+        cb.record(True)
+        assert cb.state == CLOSED
+        assert cb.get_limit(10) == 2  # ramp just started
+        cb._closed_at -= 30
+        assert cb.get_limit(10) == 5
+        cb._closed_at -= 30
+        assert cb.get_limit(10) == 10
+
+        assert states == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+        stats = cb.get_stats()
+        assert stats["state"] == CLOSED
+        assert stats["opened"] == 2
+        assert [i["state"] for i in stats["transitions"]] == states
+
+    async def test_executor_holds_jobs(self, event_loop):
+        cb = CircuitBreaker(window=1, error_rate=1, open_time=0.01, probes=1, ramp_time=0)
+        scheduler._eventloop = event_loop
+        executor = BoundedAsyncIOExecutor(limits={"recheck": 3}, default_limit=1, breaker=cb)
+        executor.start(scheduler, "test")
+        STARTED.clear()
+        try:
+            cb.record(False)
+            now = get_now()
+            for i in range(3):
+                executor.submit_job(create_job("recheck", f"recheck_{i}", now), [now])
+            assert executor.get_stats()["recheck"]["queue"] == 3
+            assert STARTED == []
+
+            await asyncio.sleep(0.02)  # half open: one probe
+            assert executor.get_stats()["recheck"]["in_flight"] == 1
+            cb.record(True)
+            assert cb.state == CLOSED
+            while any(executor.get_stats()["recheck"][i] for i in ("queue", "in_flight")):
+                await asyncio.sleep(0.01)
+            assert sorted(STARTED) == ["recheck_0", "recheck_1", "recheck_2"]
+        finally:
+            executor.shutdown()
+
+    async def test_request_api_records_outcomes(self):
+        with patch.object(breaker, "record") as mock_record:
+            with patch("prozorro_chronograph.scheduler.SESSION.get",
+                       AsyncMock(return_value=MagicMock(status=502))):
+                await request_api("get", "url")
+            with patch("prozorro_chronograph.scheduler.SESSION.get",
+                       AsyncMock(return_value=MagicMock(status=404))):
+                await request_api("get", "url")
+            with patch("prozorro_chronograph.scheduler.SESSION.get", AsyncMock(side_effect=ClientError())):
+                with pytest.raises(ClientError):
+                    await request_api("get", "url")
+        assert [i.args for i in mock_record.call_args_list] == [(False,), (True,), (False,)]
+
+    async def test_scheduler_paused_while_open(self):
+        with patch.object(type(scheduler), "running", True), \
+                patch.object(scheduler, "pause") as mock_pause, \
+                patch.object(scheduler, "resume") as mock_resume:
+            on_breaker_state(OPEN)
+            mock_pause.assert_called_once_with()
+            on_breaker_state(HALF_OPEN)
+            mock_resume.assert_called_once_with()
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import pytest
+from freezegun import freeze_time
+
+from prozorro_chronograph.scheduler import catch_up_overdue_jobs, get_catch_up_progress, CATCH_UP
+from prozorro_chronograph.utils import get_now
+from .base import BaseTest
+from .test_executor import create_job
+
+
+class TestCatchUp(BaseTest):
+    @pytest.fixture(autouse=True)
+    def reset_progress(self):
+        yield
+        CATCH_UP.update(started_at=None, run_dates=[], skipped=0)
+
+    @patch("prozorro_chronograph.scheduler.CATCH_UP_RATE", 2)
+    @patch("prozorro_chronograph.scheduler.CATCH_UP_WINDOW", 0.5)
+    async def test_catch_up(self, cli):
+        response = await cli.get("/catchup")
+        assert (await response.json())["state"] == "idle"
+
+        now = get_now()
+        jobs = [
+            create_job("recheck", "b", now - timedelta(minutes=1)),
+            create_job("recheck", "a", now - timedelta(minutes=2)),
+            create_job("resync", "c", now - timedelta(seconds=1)),
+            create_job("resync", "old", now - timedelta(hours=2)),
+        ]
+        jobstore = MagicMock(get_due_jobs_async=AsyncMock(return_value=jobs))
+        with patch.dict("prozorro_chronograph.scheduler.jobstores", {"default": jobstore}), freeze_time(now):
+            assert await catch_up_overdue_jobs() == 3
+
+        caught_up = jobstore.add_jobs.call_args.args[0]
+        assert [job.id for job in caught_up] == ["recheck_a", "recheck_b", "resync_c"]
+        # 2 jobs per second, although window is shorter
+        assert [job.next_run_time for job in caught_up] == [
+            now, now + timedelta(seconds=0.5), now + timedelta(seconds=1)
+        ]
+        assert [job.trigger.run_date for job in caught_up] == [job.next_run_time for job in caught_up]
+
+        with freeze_time(now + timedelta(seconds=0.7)):
+            response = await cli.get("/catchup")
+        assert await response.json() == {
+            "state": "running",
+            "total": 3,
+            "dispatched": 2,
+            "skipped": 1,
+            "started_at": now.isoformat(),
+            "ends_at": (now + timedelta(seconds=1)).isoformat(),
+        }
+        with freeze_time(now + timedelta(seconds=1)):
+            assert get_catch_up_progress()["state"] == "done"
+
+    async def test_nothing_overdue(self):
+        jobstore = MagicMock(get_due_jobs_async=AsyncMock(return_value=[]))
+        with patch.dict("prozorro_chronograph.scheduler.jobstores", {"default": jobstore}):
+            assert await catch_up_overdue_jobs() == 0
+        assert get_catch_up_progress()["state"] == "done"
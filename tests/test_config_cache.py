@@ -0,0 +1,33 @@
+from unittest.mock import patch, MagicMock
+
+from prozorro_chronograph.storage import get_calendar, get_streams, set_holiday, get_config
+
+from .base import BaseTest, working_days
+
+
+class TestConfigCache(BaseTest):
+    async def test_config_cached(self, db):
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.config)):
+            calendar = await get_calendar()
+            assert calendar == working_days
+            await db.config.update_one({"_id": "config"}, {"$set": {"streams": 1}})
+            assert await get_calendar() is calendar
+            assert await get_streams() != 1
+
+    async def test_config_invalidated_on_holiday(self, db):
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.config)):
+            calendar = await get_calendar()
+            assert "2021-05-11" not in calendar
+            await set_holiday("2021-05-11")
+            calendar = await get_calendar()
+            assert "2021-05-11" in calendar
+
+    @patch("prozorro_chronograph.storage.CONFIG_CACHE_TTL", 0)
+    async def test_config_version_poll(self, db):
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.config)):
+            config = await get_config()
+            assert await get_config() is config
+
+            await db.config.update_one({"_id": "config"}, {"$set": {"streams": 1}, "$inc": {"version": 1}})
+            config = await get_config()
+            assert config["streams"] == 1
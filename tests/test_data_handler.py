@@ -11,17 +11,20 @@ from .base import BaseTenderTest
 class TestDataHandler(BaseTenderTest):
     @patch("prozorro_chronograph.main.asyncio.gather", side_effect=AsyncMock())
     @patch("prozorro_chronograph.main.process_listing")
-    async def test_data_handler(self, mock_process_listing, mock_syncio_gather):
+    @patch("prozorro_chronograph.main.check_auctions")
+    async def test_data_handler(self, mock_check_auctions, mock_process_listing, mock_syncio_gather):
         async with ClientSession(cookies=self.cookies) as session:
             with patch("prozorro_chronograph.main.ClientSession", session) as mock_session:
                 items = [{"status": "active"}]
                 await data_handler(mock_session, items)
+        mock_check_auctions.assert_called_once_with([{"status": "active"}])
         mock_process_listing.assert_called_once_with(None, {"status": "active"})
         mock_syncio_gather.assert_has_calls(mock_process_listing)
 
     @patch("prozorro_chronograph.main.asyncio.gather", side_effect=AsyncMock())
     @patch("prozorro_chronograph.main.LOGGER.info")
-    async def test_data_handler_with_invalid_status(self, mock_info, mock_syncio_gather):
+    @patch("prozorro_chronograph.main.check_auctions")
+    async def test_data_handler_with_invalid_status(self, mock_check_auctions, mock_info, mock_syncio_gather):
         async with ClientSession(cookies=self.cookies) as session:
             with patch("prozorro_chronograph.main.ClientSession", session) as mock_session:
                 tender_id = uuid4().hex
@@ -31,4 +34,5 @@ class TestDataHandler(BaseTenderTest):
                 }]
                 await data_handler(mock_session, items)
         mock_info.assert_called_once_with(f"Skip tender {tender_id} with status {INVALID_STATUSES[0]}")
+        mock_check_auctions.assert_called_once_with([])
         mock_syncio_gather.assert_called_once_with()
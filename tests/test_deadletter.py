@@ -0,0 +1,50 @@
+from datetime import timedelta
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from prozorro_chronograph.scheduler import push, RetryError, get_retry_delay
+from prozorro_chronograph.settings import PUSH_RETRY_LIMIT, PUSH_RETRY_DELAY, PUSH_RETRY_MAX_DELAY
+from .base import BaseTest
+
+
+class TestDeadLetter(BaseTest):
+    @pytest.fixture
+    def deadletter(self, db, event_loop):
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", lambda name: getattr(db, name)):
+            yield db.deadletter
+        event_loop.run_until_complete(db.deadletter.delete_many({}))
+
+    def test_retry_delay(self):
+        assert [get_retry_delay(i).total_seconds() for i in range(1, 6)] == [
+            PUSH_RETRY_DELAY * i for i in (1, 1, 2, 3, 5)
+        ]
+        assert get_retry_delay(100) == timedelta(seconds=PUSH_RETRY_MAX_DELAY)
+
+    @patch("prozorro_chronograph.scheduler.add_jobs")
+    async def test_exhausted_retries(self, mock_add_jobs, deadletter, cli):
+        with patch("prozorro_chronograph.scheduler.resync_tender", AsyncMock(side_effect=RetryError())):
+            await push("resync", "tender_id", "server", attempt=PUSH_RETRY_LIMIT - 1)
+        mock_add_jobs.assert_not_called()
+        entry = await deadletter.find_one("resync_tender_id")
+        assert entry["attempts"] == PUSH_RETRY_LIMIT
+        assert entry["server_id"] == "server"
+
+        response = await cli.get("/deadletter")
+        assert response.status == 200
+        data = await response.json()
+        assert [(i["id"], i["mode"], i["tender_id"]) for i in data["entries"]] == [
+            ("resync_tender_id", "resync", "tender_id")
+        ]
+
+        response = await cli.post("/deadletter/requeue", json={"ids": ["resync_tender_id"]})
+        assert response.status == 200
+        assert await response.json() == {"requeued": 1}
+        job, = mock_add_jobs.call_args.args[0]
+        assert job["id"] == "resync_tender_id"
+        assert job["args"] == ["resync", "tender_id", "server"]
+        assert "kwargs" not in job
+        assert await deadletter.count_documents({}) == 0
+
+        response = await cli.post("/deadletter/requeue")
+        assert await response.json() == {"requeued": 0}
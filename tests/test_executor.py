@@ -0,0 +1,76 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from apscheduler.job import Job
+from apscheduler.triggers.date import DateTrigger
+
+from prozorro_chronograph.executor import BoundedAsyncIOExecutor
+from prozorro_chronograph.settings import scheduler, TZ
+from prozorro_chronograph.utils import get_now
+
+RUNNING = {"recheck": 0, "resync": 0}
+MAX_RUNNING = {"recheck": 0, "resync": 0}
+STARTED = []
+
+
+async def fake_push(mode, tender_id):
+    STARTED.append(tender_id)
+    RUNNING[mode] += 1
+    MAX_RUNNING[mode] = max(MAX_RUNNING[mode], RUNNING[mode])
+    await asyncio.sleep(0.01)
+    RUNNING[mode] -= 1
+
+
+def create_job(mode, tender_id, run_date):
+    return Job(
+        scheduler,
+        id=f"{mode}_{tender_id}",
+        func=fake_push,
+        args=[mode, tender_id],
+        kwargs={},
+        name=f"{mode} {tender_id}",
+        trigger=DateTrigger(run_date, timezone=TZ),
+        executor="default",
+        misfire_grace_time=60 * 60,
+        coalesce=True,
+        max_instances=1,
+        next_run_time=run_date,
+    )
+
+
+@pytest.mark.asyncio
+class TestBoundedAsyncIOExecutor:
+    @pytest.fixture
+    def executor(self, event_loop):
+        scheduler._eventloop = event_loop
+        executor = BoundedAsyncIOExecutor(limits={"recheck": 3, "resync": 1}, default_limit=1)
+        executor.start(scheduler, "test")
+        STARTED.clear()
+        MAX_RUNNING.update(recheck=0, resync=0)
+        yield executor
+        executor.shutdown()
+
+    async def test_limits_and_order(self, executor):
+        now = get_now()
+        for i in range(10):
+            run_date = now - timedelta(seconds=i)
+            executor.submit_job(create_job("recheck", f"recheck_{i}", run_date), [run_date])
+        for i in range(3):
+            executor.submit_job(create_job("resync", f"resync_{i}", now), [now])
+
+        stats = executor.get_stats()
+        assert stats["recheck"]["in_flight"] == 3
+        assert stats["recheck"]["queue"] == 7
+        assert stats["resync"]["in_flight"] == 1
+        assert stats["resync"]["queue"] == 2
+
+        while any(i["in_flight"] or i["queue"] for i in executor.get_stats().values()):
+            await asyncio.sleep(0.01)
+        assert MAX_RUNNING == {"recheck": 3, "resync": 1}
+        rechecks = [i for i in STARTED if i.startswith("recheck")]
+        # first 3 are started at once, others are taken by the earliest run time
+        assert rechecks[3:] == [f"recheck_{i}" for i in range(9, 2, -1)]
+        stats = executor.get_stats()
+        assert stats["recheck"]["started"] == 10
+        assert stats["recheck"]["wait_max"] > 0
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from apscheduler.job import Job
+from apscheduler.triggers.date import DateTrigger
+
+from prozorro_chronograph.jobstore import AsyncMongoDBJobStore
+from prozorro_chronograph.scheduler import push, add_jobs
+from prozorro_chronograph.settings import scheduler, jobstores, TZ
+from prozorro_chronograph.utils import get_now
+from .base import MONGODB_URL, APSCHEDULER_DATABASE
+
+
+def create_job(job_id, run_date):
+    return Job(
+        scheduler,
+        id=job_id,
+        func=push,
+        args=["recheck", job_id],
+        kwargs={},
+        name=f"Recheck {job_id}",
+        trigger=DateTrigger(run_date, timezone=TZ),
+        executor="default",
+        misfire_grace_time=60 * 60,
+        coalesce=True,
+        max_instances=1,
+        next_run_time=run_date,
+    )
+
+
+@pytest.mark.asyncio
+class TestAsyncMongoDBJobStore:
+    @pytest.fixture
+    def jobstore(self):
+        jobstore = AsyncMongoDBJobStore(
+            workers=2, database=APSCHEDULER_DATABASE, collection="test_jobs", host=MONGODB_URL
+        )
+        jobstore.start(scheduler, "test")
+        yield jobstore
+        jobstore.remove_all_jobs()
+        jobstore.shutdown()
+
+    async def test_pending_writes_are_visible(self, jobstore):
+        now = get_now()
+        due = create_job("due", now - timedelta(seconds=1))
+        later = create_job("later", now + timedelta(hours=1))
+
+        with patch.object(jobstore, "_write") as mock_write:  # writes are not persisted yet
+            jobstore.add_job(later)
+            jobstore.add_job(due)
+            assert jobstore.lookup_job("due") is due
+            assert await jobstore.lookup_job_async("later") is later
+            assert jobstore.get_due_jobs(now) == [due]
+            assert jobstore.get_next_run_time() == due.next_run_time
+            assert [job.id for job in jobstore.get_all_jobs()] == ["due", "later"]
+            jobstore.flush()
+        assert mock_write.call_count == 2
+
+    async def test_writes_are_persisted(self, jobstore):
+        now = get_now()
+        jobstore.add_job(create_job("first", now + timedelta(hours=1)))
+        jobstore.add_job(create_job("second", now + timedelta(hours=2)))
+        jobstore.remove_job("second")
+        jobstore.flush()
+        assert jobstore._pending == {}
+        assert [i["_id"] for i in jobstore.collection.find()] == ["first"]
+
+        job = await jobstore.lookup_job_async("first")
+        assert list(job.args) == ["recheck", "first"]
+        job.next_run_time = now + timedelta(hours=3)
+        jobstore.update_job(job)
+        jobstore.flush()
+        assert abs(jobstore.get_next_run_time() - job.next_run_time) < timedelta(milliseconds=1)
+        assert [i.id for i in jobstore.get_due_jobs(now + timedelta(hours=4))] == ["first"]
+
+    async def test_compact_jobs(self, jobstore):
+        now = get_now()
+        job = create_job("recheck_tender_id", now + timedelta(hours=1))
+        job._modify(args=("recheck", "tender_id", "cookie"), name="Recheck tender_id")
+        other = create_job("other", now + timedelta(hours=2))
+        jobstore.add_job(job)
+        jobstore.add_job(other)
+        jobstore.flush()
+
+        document = jobstore.collection.find_one("recheck_tender_id")
+        assert document == {
+            "_id": "recheck_tender_id",
+            "kind": "recheck",
+            "tender_id": "tender_id",
+            "run_at": document["run_at"],
+            "attempt": 0,
+            "server_id": "cookie",
+        }
+        assert "job_state" in jobstore.collection.find_one("other")
+
+        restored = await jobstore.lookup_job_async("recheck_tender_id")
+        assert restored.func is push
+        assert restored.args == ("recheck", "tender_id", "cookie")
+        assert restored.name == "Recheck tender_id"
+        assert abs(restored.next_run_time - job.next_run_time) < timedelta(milliseconds=1)
+        assert abs(restored.trigger.run_date - job.next_run_time) < timedelta(milliseconds=1)
+        assert [i.id for i in jobstore.get_due_jobs(now + timedelta(hours=3))] == ["recheck_tender_id", "other"]
+        assert abs(jobstore.get_next_run_time() - job.next_run_time) < timedelta(milliseconds=1)
+        assert set(jobstore.get_run_times()) == {"recheck_tender_id", "other"}
+
+    async def test_add_jobs(self, jobstore):
+        now = get_now()
+        jobs = [create_job(f"job_{i}", now + timedelta(minutes=i)) for i in range(10)]
+        with patch.object(jobstore.collection, "bulk_write", wraps=jobstore.collection.bulk_write) as mock_bulk_write:
+            jobstore.add_jobs(jobs)
+            assert jobstore.lookup_job("job_3").next_run_time == jobs[3].next_run_time
+            jobstore.flush()
+        assert 1 <= mock_bulk_write.call_count <= 2  # one per writer thread
+        assert jobstore._pending == {}
+        assert jobstore.collection.count_documents({}) == 10
+
+
+    async def test_add_jobs_from_scheduler(self, jobstore):
+        run_date = get_now() + timedelta(hours=1)
+        jobs = [
+            dict(func=push, id=f"recheck_{i}", name=f"Recheck {i}", run_date=run_date, args=["recheck", str(i)])
+            for i in range(5)
+        ]
+        with patch.dict(jobstores, {"default": jobstore}), \
+                patch.object(type(scheduler), "running", True), \
+                patch.object(scheduler, "wakeup") as mock_wakeup:
+            add_jobs(jobs)
+        mock_wakeup.assert_called_once()
+        jobstore.flush()
+        assert sorted(job.id for job in jobstore.get_all_jobs()) == [f"recheck_{i}" for i in range(5)]
+        assert jobstore.lookup_job("recheck_1").next_run_time == run_date
+        assert jobstore.collection.find_one("recheck_1")["kind"] == "recheck"
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+from prozorro_chronograph.loopmon import LoopMonitor
+from .base import BaseTest
+
+
+def block(monitor, name, seconds):
+    with monitor.span(name):
+        time.sleep(seconds)
+
+
+class TestLoopMonitor(BaseTest):
+    async def test_spans(self):
+        logger = MagicMock()
+        monitor = LoopMonitor(slow_threshold=0.02, logger=logger)
+        block(monitor, "get_job", 0)
+        block(monitor, "find_free_slot", 0.03)
+        await asyncio.get_running_loop().run_in_executor(None, block, monitor, "thread", 0)
+
+        stats = monitor.get_stats()
+        assert list(stats["spans"]) == ["find_free_slot", "get_job"]
+        assert stats["spans"]["get_job"]["count"] == 1
+        assert [i["name"] for i in stats["slow"]] == ["find_free_slot"]
+        logger.info.assert_called_once()
+        assert "Slow callback find_free_slot" in logger.info.call_args.args[0]
+
+    async def test_lag_and_callbacks(self):
+        monitor = LoopMonitor(interval=0.01, slow_threshold=0.02, trace_callbacks=True)
+        original_run = asyncio.events.Handle._run
+        monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+
+            def blocking_callback():
+                block(monitor, "get_due_jobs", 0.03)
+                block(monitor, "add_job", 0)
+
+            asyncio.get_running_loop().call_soon(blocking_callback)
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+        assert asyncio.events.Handle._run is original_run
+        stats = monitor.get_stats()
+        assert stats["lag"]["max"] >= 0.02
+        assert stats["lag"]["samples"] > 1
+        slow, = [i for i in stats["slow"] if i["name"].endswith("blocking_callback")]
+        assert [i["name"] for i in slow["spans"]] == ["get_due_jobs", "add_job"]
+
+    async def test_loop_view(self, cli):
+        response = await cli.get("/loop")
+        assert response.status == 200
+        assert set(await response.json()) == {"lag", "spans", "slow"}
@@ -0,0 +1,57 @@
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from prozorro_chronograph.metrics import Counter, Histogram, METRICS, MONGODB_CALLS, API_RESPONSES
+from prozorro_chronograph.scheduler import request_api
+from prozorro_chronograph.storage import get_mongodb_collection, CountedCollection, get_dead_letters
+from .base import BaseTest
+
+
+class TestMetrics(BaseTest):
+    def test_render(self):
+        counter = Counter("test_calls_total", "Calls", ["function"])
+        histogram = Histogram("test_duration_seconds", "Duration", buckets=(0.1, 1))
+        try:
+            counter.inc('get_"config"')
+            counter.inc('get_"config"', value=2)
+            for value in (0.05, 0.1, 0.5, 5):
+                histogram.observe(value)
+            assert counter.render() == [
+                "# HELP test_calls_total Calls",
+                "# TYPE test_calls_total counter",
+                'test_calls_total{function="get_\\"config\\""} 3',
+            ]
+            assert histogram.render()[2:] == [
+                'test_duration_seconds_bucket{le="0.1"} 2',
+                'test_duration_seconds_bucket{le="1"} 3',
+                'test_duration_seconds_bucket{le="+Inf"} 4',
+                "test_duration_seconds_sum 5.65",
+                "test_duration_seconds_count 4",
+            ]
+        finally:
+            METRICS.remove(counter)
+            METRICS.remove(histogram)
+
+    async def test_mongodb_calls(self, db):
+        collection = get_mongodb_collection("deadletter")
+        assert isinstance(collection, CountedCollection)
+        assert collection.function == "test_mongodb_calls"
+
+        before = MONGODB_CALLS.values.get(("get_dead_letters", "find"), 0)
+        with patch("prozorro_chronograph.storage.AsyncIOMotorClient", MagicMock(return_value=db.client)), \
+                patch("prozorro_chronograph.storage.DB_CONNECTION", None):
+            await get_dead_letters()
+        assert MONGODB_CALLS.values[("get_dead_letters", "find")] == before + 1
+
+    async def test_metrics_view(self, cli):
+        with patch("prozorro_chronograph.scheduler.SESSION.get", AsyncMock(return_value=MagicMock(status=404))):
+            await request_api("get", "url")
+        assert API_RESPONSES.values[("get", "404")] >= 1
+
+        response = await cli.get("/metrics")
+        assert response.status == 200
+        assert response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+        text = await response.text()
+        assert 'chronograph_api_responses_total{method="get",status="404"}' in text
+        assert 'chronograph_api_request_duration_seconds_count{method="get"}' in text
+        assert 'chronograph_due_jobs{kind="recheck"} 0' in text
+        assert "# TYPE chronograph_job_lag_seconds histogram" in text
@@ -3,7 +3,8 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock, AsyncMock
 
 from prozorro_chronograph.scheduler import planning_auction, free_slots
-from prozorro_chronograph.settings import TZ
+from prozorro_chronograph.storage import get_date, get_dates, reserve_slot, get_full_days_stats
+from prozorro_chronograph.settings import TZ, WORKING_DAY_START
 from .api_data import test_tender_data
 from .base import BaseTest, working_days
 
@@ -67,3 +68,66 @@ class TestTenderPlanning(BaseTest):
             res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
             assert res.date() != date
             assert res.date() == ndate
+
+    async def test_auction_planning_concurrent_reservation(self, db):
+        date = datetime(2015, 9, 21).date()
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.plans)):
+            day_start, stream, plan = await get_date("test", date)
+            slot_end = (datetime.combine(date, day_start) + timedelta(minutes=30)).time()
+            reserve_args = dict(
+                plan=plan,
+                stream_id=stream,
+                lot_id=None,
+                start_time=day_start,
+                end_time=slot_end,
+            )
+            assert await reserve_slot(tender_id="first", **reserve_args) is True
+            assert await reserve_slot(tender_id="second", **reserve_args) is False
+
+            day_start, stream, plan = await get_date("test", date)
+            assert day_start == slot_end
+            assert len(plan["streams"][0]["slots"]) == 1
+            assert plan["streams"][0]["slots"][0]["tender_id"] == "first"
+
+    async def test_auction_planning_retry_on_conflict(self, db):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.plans)):
+            with patch("prozorro_chronograph.scheduler.reserve_slot",
+                       AsyncMock(side_effect=[False, True])) as mock_reserve_slot:
+                res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        assert mock_reserve_slot.call_count == 2
+        assert res == TZ.localize(datetime.combine(some_date.date(), WORKING_DAY_START))
+
+    async def test_auction_planning_prefetch_full_days(self, db):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        full_days = ["2015-09-21", "2015-09-22", "2015-09-23"]
+        await db.plans.insert_many([
+            {"_id": f"plantest_{day}", "time": "16:00:00", "streams_count": 10}
+            for day in full_days
+        ])
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.plans)):
+            with patch("prozorro_chronograph.scheduler.get_dates", AsyncMock(wraps=get_dates)) as mock_get_dates:
+                res, _, skipped = await planning_auction(test_tender_data_test_quick, some_date)
+        assert res.date().isoformat() == "2015-09-24"
+        assert skipped == 3
+        mock_get_dates.assert_called_once()
+
+    async def test_auction_planning_full_days_cache(self, db):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        await db.plans.insert_one({"_id": "plantest_2015-09-21", "time": "16:00:00", "streams_count": 10})
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.plans)):
+            stats = get_full_days_stats()
+            res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+            assert res.date().isoformat() == "2015-09-22"
+            assert get_full_days_stats()["size"] == stats["size"] + 1
+
+            with patch("prozorro_chronograph.scheduler.get_dates", AsyncMock(wraps=get_dates)) as mock_get_dates:
+                res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+            assert res.date().isoformat() == "2015-09-22"
+            assert get_full_days_stats()["hits"] == stats["hits"] + 1
+            assert mock_get_dates.call_args[0][1][0].isoformat() == "2015-09-22"
+
+        with patch("prozorro_chronograph.scheduler.get_streams", AsyncMock(return_value=11)):
+            with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock(return_value=db.plans)):
+                res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        assert res.date().isoformat() == "2015-09-21"
@@ -0,0 +1,54 @@
+from datetime import datetime
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from prozorro_chronograph.migrate_plans import migrate_plans
+from prozorro_chronograph.scheduler import planning_auction, free_slots
+from prozorro_chronograph.settings import TZ, WORKING_DAY_START
+from .base import BaseTest, working_days
+from .test_planning import test_tender_data_test_quick
+
+
+@patch("prozorro_chronograph.scheduler.get_streams", AsyncMock(return_value=10))
+@patch("prozorro_chronograph.scheduler.get_calendar", AsyncMock(return_value=working_days))
+class TestFlatPlansLayout(BaseTest):
+    @pytest.fixture
+    def collections(self, db, event_loop):
+        collections = {"plans": db.plans, "slots": db.slots, "tender_slots": db.tender_slots}
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", collections.get), \
+                patch("prozorro_chronograph.migrate_plans.get_mongodb_collection", collections.get):
+            yield collections
+        event_loop.run_until_complete(db.slots.delete_many({}))
+        event_loop.run_until_complete(db.tender_slots.delete_many({}))
+
+    @patch("prozorro_chronograph.storage.PLANS_LAYOUT", "flat")
+    async def test_flat_planning(self, collections):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        first, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        second, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        assert first == TZ.localize(datetime.combine(some_date.date(), WORKING_DAY_START))
+        assert second > first
+
+        plan = await collections["plans"].find_one({"_id": "plantest_2015-09-21"})
+        assert "streams" not in plan
+        assert await collections["slots"].count_documents({"mode": "test", "date": "2015-09-21"}) == 2
+
+        await free_slots("", first, {})
+        assert await collections["slots"].count_documents({"tender_id": None}) == 2
+        res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        assert res == first
+
+    async def test_migrate_plans(self, collections):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        first, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        second, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+
+        assert await migrate_plans() == 1
+        plan = await collections["plans"].find_one({"_id": "plantest_2015-09-21"})
+        assert "streams" not in plan
+        assert await collections["slots"].count_documents({}) == 2
+
+        with patch("prozorro_chronograph.storage.PLANS_LAYOUT", "flat"):
+            res, *_ = await planning_auction(test_tender_data_test_quick, some_date)
+        assert res > second
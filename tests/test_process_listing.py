@@ -1,11 +1,11 @@
 from uuid import uuid4
 from datetime import timedelta
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 from freezegun import freeze_time
 
-from prozorro_chronograph.utils import get_now
+from prozorro_chronograph.utils import get_now, get_jitter
 from prozorro_chronograph.scheduler import process_listing, push
-from prozorro_chronograph.settings import TZ
+from prozorro_chronograph.settings import TZ, SMOOTHING_MIN, SMOOTHING_MAX
 
 from .base import BaseTenderTest
 
@@ -13,7 +13,7 @@ from .base import BaseTenderTest
 class TestTenderProcessListing(BaseTenderTest):
     @freeze_time("2012-01-14")
     @patch("prozorro_chronograph.scheduler.check_auction")
-    @patch("prozorro_chronograph.scheduler.randint", return_value=2)
+    @patch("prozorro_chronograph.scheduler.get_jitter", return_value=timedelta(seconds=2))
     @patch("prozorro_chronograph.scheduler.asyncio.sleep")
     @patch("prozorro_chronograph.scheduler.scheduler.add_job")
     async def test_process_listing_without_next_check(self, mock_add_job, mock_sleep, _, __, caplog):
@@ -44,7 +44,7 @@ class TestTenderProcessListing(BaseTenderTest):
 
     @freeze_time("2012-01-14")
     @patch("prozorro_chronograph.scheduler.check_auction")
-    @patch("prozorro_chronograph.scheduler.randint", Mock(return_value=2))
+    @patch("prozorro_chronograph.scheduler.get_jitter", Mock(return_value=timedelta(seconds=2)))
     @patch("prozorro_chronograph.scheduler.asyncio.sleep")
     @patch("prozorro_chronograph.scheduler.scheduler.add_job")
     async def test_process_listing_with_next_check(self, mock_add_job, mock_sleep, _, caplog):
@@ -75,7 +75,7 @@ class TestTenderProcessListing(BaseTenderTest):
 
     @freeze_time("2012-01-14")
     @patch("prozorro_chronograph.scheduler.check_auction")
-    @patch("prozorro_chronograph.scheduler.randint", return_value=2)
+    @patch("prozorro_chronograph.scheduler.get_jitter", return_value=timedelta(seconds=2))
     @patch("prozorro_chronograph.scheduler.asyncio.sleep")
     @patch("prozorro_chronograph.scheduler.scheduler.add_job")
     async def test_process_listing_with_next_check_without_recheck_job(self, mock_add_job, mock_sleep, _, __, caplog):
@@ -102,3 +102,28 @@ class TestTenderProcessListing(BaseTenderTest):
         assert f"Tender {tenant_id} don't need to resync" in caplog.messages[1]
         assert len(caplog.messages) == 2
         mock_sleep.assert_called_once_with(1)
+
+    @freeze_time("2012-01-14")
+    @patch("prozorro_chronograph.scheduler.asyncio.sleep")
+    @patch("prozorro_chronograph.scheduler.scheduler.add_job")
+    async def test_process_listing_same_next_check(self, mock_add_job, mock_sleep, caplog):
+        tender = {
+            "id": uuid4().hex,
+            "next_check": (get_now() + timedelta(days=2)).isoformat(),
+        }
+        await process_listing("value", tender)
+        run_date = mock_add_job.call_args.kwargs["run_date"]
+        assert SMOOTHING_MIN <= (run_date - get_now() - timedelta(days=2)).seconds <= SMOOTHING_MAX
+        assert run_date == get_now() + timedelta(days=2) + get_jitter(tender["id"], tender["next_check"])
+
+        # the same job isn't rewritten by the next feed pass
+        mock_add_job.reset_mock()
+        with patch("prozorro_chronograph.scheduler.get_job", AsyncMock(return_value=Mock(next_run_time=run_date))):
+            await process_listing("value", tender)
+        mock_add_job.assert_not_called()
+
+        # next_check is changed
+        tender["next_check"] = (get_now() + timedelta(days=3)).isoformat()
+        with patch("prozorro_chronograph.scheduler.get_job", AsyncMock(return_value=Mock(next_run_time=run_date))):
+            await process_listing("value", tender)
+        mock_add_job.assert_called_once()
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from prozorro_chronograph.profiler import SamplingProfiler, ProfilerBusy, get_coro_stack
+from .base import BaseTest
+
+
+async def waiting_task():
+    await asyncio.sleep(1)
+
+
+def blocking_callback():
+    time.sleep(0.05)
+
+
+class TestProfiler(BaseTest):
+    def test_mock_coroutine(self):
+        # mocks have any attribute, so their "await chain" never ends
+        assert get_coro_stack(MagicMock()) == []
+
+    async def test_profile(self):
+        profiler = SamplingProfiler(interval=0.005, task_interval=0.01)
+        task = asyncio.ensure_future(waiting_task())
+        asyncio.get_running_loop().call_later(0.02, blocking_callback)
+        try:
+            result = await profiler.profile(0.1)
+        finally:
+            task.cancel()
+        assert not profiler.running
+        loop_stacks = dict(line.rsplit(" ", 1) for line in result["loop"].splitlines())
+        task_stacks = dict(line.rsplit(" ", 1) for line in result["tasks"].splitlines())
+        assert all(count.isdigit() for count in [*loop_stacks.values(), *task_stacks.values()])
+        assert all(stack.startswith("loop;") for stack in loop_stacks)
+        assert any(stack.endswith("tests.test_profiler:blocking_callback") for stack in loop_stacks)
+        assert "task;tests.test_profiler:waiting_task;asyncio.tasks:sleep" in task_stacks
+
+    async def test_single_session(self):
+        profiler = SamplingProfiler()
+        first = asyncio.ensure_future(profiler.profile(0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(ProfilerBusy):
+            await profiler.profile(0.05)
+        await first
+
+    async def test_profile_view(self, cli):
+        response = await cli.get("/profile?seconds=0.05")
+        assert response.status == 200
+        assert "loop;" in await response.text()
+        response = await cli.get("/profile?seconds=0.05&stacks=tasks")
+        assert response.status == 200
+        assert "loop;" not in await response.text()
+
+        response = await cli.get("/profile?seconds=1000")
+        assert response.status == 400
+        response = await cli.get("/profile?seconds=x")
+        assert response.status == 400
+        response = await cli.get("/profile?stacks=x")
+        assert response.status == 400
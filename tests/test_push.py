@@ -1,41 +1,44 @@
+import asyncio
 from uuid import uuid4
 from datetime import timedelta
 from unittest.mock import patch, AsyncMock
 
 from prozorro_chronograph.utils import get_now
-from prozorro_chronograph.scheduler import push
+from prozorro_chronograph.scheduler import push, get_single_flight_stats
 
 from .base import BaseTenderTest
 
 
 class TestTenderPush(BaseTenderTest):
-    @patch("prozorro_chronograph.scheduler.asyncio.sleep")
-    @patch("prozorro_chronograph.scheduler.get_feed_position", AsyncMock(return_value={"server_id": "value"}))
+    @patch("prozorro_chronograph.scheduler.add_jobs")
     @patch("prozorro_chronograph.scheduler.LOGGER.error")
-    async def test_push_recheck_mode(self, mock_logger_error, *args):
+    async def test_push_recheck_mode(self, mock_logger_error, mock_add_jobs):
         mode = "recheck"
         tender_id = uuid4().hex
         server_id = "value"
-        return_recheck_tender = (get_now() + timedelta(minutes=1)).isoformat()
         with patch("prozorro_chronograph.scheduler.recheck_tender",
-                   AsyncMock(side_effect=[Exception(), return_recheck_tender])) as mock_recheck_tender:
+                   AsyncMock(side_effect=Exception())) as mock_recheck_tender:
             await push(mode, tender_id, server_id)
         mock_logger_error.assert_called_once_with(f"Error on {mode} tender {tender_id}: {repr(Exception())}")
-        mock_recheck_tender.assert_called_with(tender_id)
+        mock_recheck_tender.assert_called_once_with(tender_id, server_id)
+        job, = mock_add_jobs.call_args.args[0]
+        assert job["id"] == f"recheck_{tender_id}"
+        assert job["args"] == [mode, tender_id, server_id]
+        assert job["kwargs"] == {"attempt": 1}
 
-    @patch("prozorro_chronograph.scheduler.asyncio.sleep")
-    @patch("prozorro_chronograph.scheduler.get_feed_position", AsyncMock(return_value={"server_id": "value"}))
+    @patch("prozorro_chronograph.scheduler.add_jobs")
     @patch("prozorro_chronograph.scheduler.LOGGER.error")
-    async def test_push_resync_mode(self, mock_logger_error, *args):
+    async def test_push_resync_mode(self, mock_logger_error, mock_add_jobs):
         mode = "resync"
         tender_id = uuid4().hex
         server_id = "value"
         return_resync_tender = (get_now() + timedelta(minutes=1)).isoformat()
         with patch("prozorro_chronograph.scheduler.resync_tender",
-                   AsyncMock(side_effect=[Exception(), return_resync_tender])) as mock_resync_tender:
-            await push(mode, tender_id, server_id)
-        mock_logger_error.assert_called_once_with(f"Error on {mode} tender {tender_id}: {repr(Exception())}")
-        mock_resync_tender.assert_called_with(tender_id)
+                   AsyncMock(return_value=return_resync_tender)) as mock_resync_tender:
+            await push(mode, tender_id, server_id, attempt=3)
+        mock_logger_error.assert_not_called()
+        mock_resync_tender.assert_called_once_with(tender_id, server_id)
+        mock_add_jobs.assert_not_called()
 
     @patch("prozorro_chronograph.scheduler.asyncio.sleep")
     @patch("prozorro_chronograph.scheduler.get_feed_position", AsyncMock(return_value={"server_id": "value"}))
@@ -64,3 +67,29 @@ class TestTenderPush(BaseTenderTest):
             await push(mode, tender_id, server_id)
         mock_update_cookies.assert_called_with({"SERVER_ID": None})
         mock_resync_tender.assert_called_with(tender_id)
+
+    async def test_push_single_flight(self):
+        tender_id = uuid4().hex
+        calls = []
+
+        def fake_call(mode):
+            async def call(tid, server_id):
+                calls.append(f"{mode} start")
+                await asyncio.sleep(0.01)
+                calls.append(f"{mode} end")
+            return call
+
+        stats = get_single_flight_stats()
+        with patch("prozorro_chronograph.scheduler.recheck_tender", fake_call("recheck")), \
+                patch("prozorro_chronograph.scheduler.resync_tender", fake_call("resync")):
+            await asyncio.gather(
+                push("recheck", tender_id),
+                push("recheck", tender_id),
+                push("resync", tender_id),
+                push("resync", tender_id),
+            )
+        # resync waits for recheck, the second recheck and resync are coalesced
+        assert calls == ["recheck start", "recheck end", "resync start", "resync end"]
+        new_stats = get_single_flight_stats()
+        assert new_stats["coalesced"] - stats["coalesced"] == 2
+        assert new_stats["in_flight"] == 0
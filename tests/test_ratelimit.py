@@ -0,0 +1,61 @@
+import asyncio
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+
+from prozorro_chronograph.ratelimit import AdaptiveRateLimiter
+from prozorro_chronograph.scheduler import request_api
+
+
+@pytest.mark.asyncio
+class TestAdaptiveRateLimiter:
+    async def test_aimd(self):
+        limiter = AdaptiveRateLimiter(ceiling=8, floor=1, increase=1)
+        limiter.on_response(429)
+        assert limiter.rate == 4
+        limiter.on_response(429)  # the same burst of 429
+        assert limiter.rate == 4
+        limiter.decreased_at -= 1
+        limiter.on_response(429)
+        assert limiter.rate == 2
+        assert limiter.throttled == 3
+
+        for _ in range(2 * 4):  # ~ 2 seconds of requests
+            limiter.on_response(200)
+        assert 3.5 < limiter.rate < 5
+        for _ in range(1000):
+            limiter.on_response(200)
+        assert limiter.rate == 8
+
+    async def test_floor(self):
+        limiter = AdaptiveRateLimiter(ceiling=2, floor=1)
+        for _ in range(5):
+            limiter.decreased_at = None
+            limiter.on_response(429)
+        assert limiter.rate == 1
+
+    async def test_acquire_waits_for_tokens(self):
+        limiter = AdaptiveRateLimiter(ceiling=20)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(*(limiter.acquire() for _ in range(25)))
+        assert loop.time() - started >= 0.2
+        assert limiter.waiting == 0
+
+    async def test_queue_gauge(self):
+        limiter = AdaptiveRateLimiter(ceiling=1)
+        await limiter.acquire()
+        task = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["queue"] == 1
+        await task
+        assert limiter.get_stats()["queue"] == 0
+
+    async def test_request_api(self):
+        limiter = AdaptiveRateLimiter(ceiling=4)
+        response = MagicMock(status=429)
+        with patch("prozorro_chronograph.scheduler.LIMITER", limiter), \
+                patch("prozorro_chronograph.scheduler.SESSION.get", AsyncMock(return_value=response)) as mock_get:
+            assert await request_api("get", "url", timeout=1) is response
+        mock_get.assert_called_once_with("url", timeout=1)
+        assert limiter.rate == 2
@@ -0,0 +1,66 @@
+from http.cookies import SimpleCookie
+from unittest.mock import patch, call, AsyncMock, MagicMock
+
+import pytest
+
+from prozorro_chronograph.scheduler import request_api, get_server_id
+from prozorro_chronograph.session import APISession
+
+
+@pytest.mark.asyncio
+class TestAPISession:
+    async def test_lazy_session(self):
+        api_session = APISession(
+            headers={"User-Agent": "test"},
+            limit=7,
+            limit_per_host=3,
+            keepalive_timeout=5,
+            dns_cache_ttl=60,
+            connect_timeout=1,
+            read_timeout=2,
+        )
+        assert api_session._session is None
+        assert api_session.get_stats() == {"limit": 7, "limit_per_host": 3, "requests": 0, "in_use": 0, "idle": 0}
+
+        session = api_session.session
+        assert api_session.session is session
+        assert session.connector.limit == 7
+        assert session.connector.limit_per_host == 3
+        assert session.timeout.sock_connect == 1
+        assert session.timeout.sock_read == 2
+
+        await api_session.close()
+        assert session.closed
+        assert api_session._session is None
+        assert api_session.session is not session
+        await api_session.close()
+
+    async def test_request_pinned_by_server_id(self):
+        response = MagicMock(status=200, cookies={})
+        with patch("prozorro_chronograph.scheduler.SESSION.get", AsyncMock(return_value=response)) as mock_get:
+            assert await request_api("get", "url", server_id="backend_1") is response
+            assert await request_api("get", "url") is response
+        assert mock_get.call_args_list == [
+            call("url", cookies={"SERVER_ID": "backend_1"}),
+            call("url"),
+        ]
+
+    async def test_refresh_server_id_on_412(self):
+        precondition_failed = MagicMock(status=412, cookies=SimpleCookie("SERVER_ID=backend_2"))
+        response = MagicMock(status=200, cookies={})
+        with patch("prozorro_chronograph.scheduler.SESSION.patch",
+                   AsyncMock(side_effect=[precondition_failed, response])) as mock_patch:
+            assert await request_api("patch", "url", server_id="backend_1", json={}) is response
+        assert mock_patch.call_args_list == [
+            call("url", cookies={"SERVER_ID": "backend_1"}, json={}),
+            call("url", cookies={"SERVER_ID": "backend_2"}, json={}),
+        ]
+        assert get_server_id(precondition_failed, "backend_1") == "backend_2"
+        assert get_server_id(response, "backend_1") == "backend_1"
+
+    async def test_412_without_new_server_id(self):
+        precondition_failed = MagicMock(status=412, cookies=SimpleCookie("SERVER_ID=backend_1"))
+        with patch("prozorro_chronograph.scheduler.SESSION.get",
+                   AsyncMock(return_value=precondition_failed)) as mock_get:
+            assert await request_api("get", "url", server_id="backend_1") is precondition_failed
+        mock_get.assert_called_once()
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+
+from prozorro_chronograph.scheduler import planning_auction, check_auctions
+from prozorro_chronograph.storage import free_slots, has_tender_slots, rebuild_tender_slots
+from .base import BaseTest, working_days
+from .test_planning import test_tender_data_test_quick
+
+
+@patch("prozorro_chronograph.scheduler.get_streams", AsyncMock(return_value=10))
+@patch("prozorro_chronograph.scheduler.get_calendar", AsyncMock(return_value=working_days))
+class TestTenderSlots(BaseTest):
+    @pytest.fixture
+    def collections(self, db, event_loop):
+        collections = {"plans": db.plans, "tender_slots": db.tender_slots}
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", collections.get):
+            yield collections
+        event_loop.run_until_complete(db.tender_slots.delete_many({}))
+
+    async def test_free_slots_of_tender_without_slots(self, collections):
+        tender = dict(test_tender_data_test_quick, id="tender_without_slots")
+        assert await has_tender_slots(tender["id"]) is False
+        with patch("prozorro_chronograph.storage.get_mongodb_collection", MagicMock()) as mock_collection:
+            await free_slots(tender["id"], None, {})
+        mock_collection.assert_not_called()
+
+    async def test_free_slots_by_index(self, collections):
+        tender = dict(test_tender_data_test_quick, id="tender_with_slots")
+        some_date = datetime(2015, 9, 21, 6, 30)
+        start, *_ = await planning_auction(tender, some_date)
+        assert await has_tender_slots(tender["id"]) is True
+        entry = await collections["tender_slots"].find_one({"tender_id": tender["id"]})
+        assert entry["plan_id"] == "plantest_2015-09-21"
+        assert entry["stream_id"] == 1
+
+        # auction is set to the reserved slot, so it's kept
+        await free_slots(tender["id"], start + timedelta(minutes=10), {})
+        assert await collections["tender_slots"].count_documents({"tender_id": tender["id"]}) == 1
+
+        await free_slots(tender["id"], None, {})
+        assert await collections["tender_slots"].count_documents({"tender_id": tender["id"]}) == 0
+        assert await has_tender_slots(tender["id"]) is False
+        plan = await collections["plans"].find_one({"_id": "plantest_2015-09-21"})
+        assert plan["streams"][0]["slots"][0]["tender_id"] is None
+
+    async def test_rebuild_tender_slots(self, collections):
+        tender = dict(test_tender_data_test_quick, id="tender_to_rebuild")
+        await planning_auction(tender, datetime(2015, 9, 21, 6, 30))
+        await collections["tender_slots"].delete_many({})
+        assert await rebuild_tender_slots() == 1
+        assert await collections["tender_slots"].count_documents({"tender_id": tender["id"]}) == 1
+
+    async def test_check_auctions_batch(self, collections):
+        some_date = datetime(2015, 9, 21, 6, 30)
+        first = dict(test_tender_data_test_quick, id="first_batch_tender")
+        second = dict(test_tender_data_test_quick, id="second_batch_tender")
+        first_start, *_ = await planning_auction(first, some_date)
+        await planning_auction(second, some_date)
+        first["auctionPeriod"] = {"startDate": (first_start + timedelta(minutes=10)).isoformat()}
+        without_slots = dict(test_tender_data_test_quick, id="batch_tender_without_slots")
+
+        await check_auctions([first, second, without_slots])
+        assert await collections["tender_slots"].count_documents({"tender_id": first["id"]}) == 1
+        assert await collections["tender_slots"].count_documents({"tender_id": second["id"]}) == 0
+        plan = await collections["plans"].find_one({"_id": "plantest_2015-09-21"})
+        assert [i["tender_id"] for i in plan["streams"][0]["slots"]] == [first["id"], None]
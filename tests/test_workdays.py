@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from prozorro_chronograph.workdays import WorkingDaysIndex, get_working_days_index
+from .base import working_days
+
+
+def is_working_day(day, calendar):
+    return not calendar.get(day.isoformat()) and day.weekday() not in (5, 6)
+
+
+def probe_next(day, calendar):
+    while not is_working_day(day, calendar):
+        day += timedelta(days=1)
+    return day
+
+
+class TestWorkingDaysIndex:
+    calendar = {"2021-08-24": True, "2021-08-23": True, "2022-01-03": True}
+
+    def test_next_working_day(self):
+        index = WorkingDaysIndex(self.calendar, date(2021, 1, 1), date(2022, 1, 1))
+        assert index.next_working_day(date(2021, 8, 20)) == date(2021, 8, 20)
+        assert index.next_working_day(date(2021, 8, 21)) == date(2021, 8, 25)
+        assert not index.is_working_day(date(2021, 8, 24))
+        assert index.is_working_day(date(2021, 8, 25))
+        # out of range days are probed one by one
+        assert index.next_working_day(date(2022, 1, 1)) == date(2022, 1, 4)
+        assert index.next_working_day(date(2020, 12, 26)) == date(2020, 12, 28)
+
+    def test_nth_working_day_after(self):
+        index = WorkingDaysIndex(self.calendar, date(2021, 1, 1), date(2022, 1, 1))
+        assert index.nth_working_day_after(date(2021, 8, 20), 1) == date(2021, 8, 25)
+        assert index.nth_working_day_after(date(2021, 8, 20), 3) == date(2021, 8, 27)
+        assert index.nth_working_day_after(date(2021, 12, 30), 2) == date(2022, 1, 4)
+        assert index.working_days(date(2021, 8, 21), 3) == [
+            date(2021, 8, 25), date(2021, 8, 26), date(2021, 8, 27)
+        ]
+        assert index.working_days(date(2021, 12, 30), 3) == [
+            date(2021, 12, 30), date(2021, 12, 31), date(2022, 1, 4)
+        ]
+
+    def test_same_as_probing(self):
+        index = WorkingDaysIndex(working_days, date(2020, 1, 1), date(2024, 1, 1))
+        day = date(2019, 12, 1)
+        while day < date(2024, 2, 1):
+            assert index.next_working_day(day) == probe_next(day, working_days)
+            day += timedelta(days=1)
+
+    def test_rebuilt_on_calendar_change(self):
+        index = get_working_days_index(self.calendar)
+        assert get_working_days_index(self.calendar) is index
+        assert get_working_days_index(dict(self.calendar)) is not index